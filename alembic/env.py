@@ -8,7 +8,6 @@ from sqlalchemy import pool
 from alembic import context
 import sqlalchemy as sa
 from sqlalchemy import text
-from app.utils.logger import log
 
 # Ensure project root (parent of alembic/) is on sys.path so 'app' package resolves
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -20,6 +19,7 @@ if ROOT_DIR not in sys.path:
 
 from app.config import settings
 from app.models.database import Base
+from app.utils.logger import log
 
 # this is the Alembic Config object
 config = context.config
@@ -101,6 +101,9 @@ def run_migrations_online() -> None:
             _ensure_schema(connection)
         except Exception as e:
             log.warning(f"Schema ensure step failed: {e}")
+        # The inspection above autobegins a transaction; end it so the
+        # migrations below (and their version stamp) run in their own
+        connection.commit()
 
         context.configure(
             connection=connection,
@@ -0,0 +1,57 @@
+"""Add analytics date-range indexes
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, INCLUDE columns, partial-index predicate)
+INDEXES = [
+    ("ix_conversations_created_at", "conversations", "created_at", "escalated", None),
+    ("ix_conversations_escalated_created_at", "conversations", "created_at", None, "escalated = true"),
+    ("ix_messages_created_at", "messages", "created_at", "sender_type, response_time_ms, sentiment_score", None),
+    ("ix_messages_created_at_intent", "messages", "created_at, intent", None, "intent IS NOT NULL"),
+    ("ix_analytics_metric_type_timestamp", "analytics", 'metric_type, "timestamp"', "dimension, metric_value", None),
+]
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases bootstrapped by Base.metadata.create_all already have these
+    if op.get_bind().dialect.name == "postgresql":
+        # CONCURRENTLY cannot run inside a transaction, and avoids blocking writes on large tables
+        with op.get_context().autocommit_block():
+            for name, table, columns, include, where in INDEXES:
+                sql = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"
+                if include:
+                    sql += f" INCLUDE ({include})"
+                if where:
+                    sql += f" WHERE {where}"
+                op.execute(sa.text(sql))
+    else:
+        # SQLite has partial indexes but no INCLUDE; true is an alias of 1 since 3.23
+        for name, table, columns, _, where in INDEXES:
+            sql = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+            if where:
+                sql += f" WHERE {where}"
+            op.execute(sa.text(sql))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, *_ in reversed(INDEXES):
+                op.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    else:
+        for name, *_ in reversed(INDEXES):
+            op.execute(sa.text(f"DROP INDEX IF EXISTS {name}"))
@@ -1,5 +1,7 @@
 """LangGraph workflow definition."""
 
+import asyncio
+import threading
 from typing import Dict, Any, TypedDict, List
 from langgraph.graph import StateGraph, END
 from app.agent.nodes import AgentNodes
@@ -11,6 +13,7 @@ class AgentState(TypedDict):
 
     Attributes:
         message: The current message being processed.
+        message_lower: Lowercased, stripped message shared by keyword checks.
         conversation_history: List of past message dictionaries.
         intent: Classified intent of the user message.
         formatted_context: String representation of conversation history.
@@ -29,6 +32,7 @@ class AgentState(TypedDict):
         tool_results: Dictionary of results from executed tools.
     """
     message: str
+    message_lower: str
     conversation_history: List[Dict[str, Any]]
     intent: str
     formatted_context: str
@@ -76,75 +80,68 @@ class CustomerSupportAgent:
         
         # Add nodes
         workflow.add_node("classify", self.nodes.classify_message)
-        workflow.add_node("retrieve_context", self.nodes.retrieve_context)
-        workflow.add_node("check_escalation", self.nodes.check_escalation)
-        workflow.add_node("plan_tools", self.nodes.plan_tools)
+        workflow.add_node("gather_context", self.nodes.gather_context)
         workflow.add_node("run_tools", self.nodes.run_tools)
         workflow.add_node("resolve_with_tools", self.nodes.resolve_with_tools)
         workflow.add_node("generate_response", self.nodes.generate_response)
-        workflow.add_node("validate_response", self.nodes.validate_response)
         
         # Define edges
         workflow.set_entry_point("classify")
         
-        # After classification, retrieve context
-        workflow.add_edge("classify", "retrieve_context")
-        
-        # After context retrieval, check for escalation
-        workflow.add_edge("retrieve_context", "check_escalation")
+        # Urgent messages already carry the handoff reply after classification
+        def route_after_classify(state: AgentState) -> str:
+            """End immediately for urgent messages, otherwise gather context."""
+            if state.get("requires_escalation"):
+                return "end"
+            return "gather_context"
+
+        # Otherwise retrieve context, check escalation and plan tools
+        # (merged into a single gather_context step)
+        workflow.add_conditional_edges(
+            "classify",
+            route_after_classify,
+            {
+                "gather_context": "gather_context",
+                "end": END,
+            }
+        )
         
-        # Conditional edge based on escalation
-        def should_escalate(state: AgentState) -> str:
-            """Determine next node based on escalation.
+        # Single routing decision on escalation and planned tools
+        def route_after_context(state: AgentState) -> str:
+            """Determine next node based on escalation and planned tools.
 
             If escalation is required, generate a response (handoff message) and skip validation.
-            Otherwise, proceed to normal response and validation.
+            Otherwise run planned tools, or answer directly when none were planned.
             """
             if state.get("requires_escalation"):
                 return "generate_response_escalated"
-            return "plan_tools"
+            if state.get("planned_tool_calls"):
+                return "run_tools"
+            return "generate_response"
         
         # Add a branch node for escalated path which goes directly to END
         workflow.add_node("generate_response_escalated", self.nodes.generate_response)
         workflow.add_conditional_edges(
-            "check_escalation",
-            should_escalate,
+            "gather_context",
+            route_after_context,
             {
-                "plan_tools": "plan_tools",
+                "run_tools": "run_tools",
+                "generate_response": "generate_response",
                 "generate_response_escalated": "generate_response_escalated",
             }
         )
-        
-        # Decide whether to run tools after planning
-        def has_tools(state: AgentState) -> str:
-            planned = state.get("planned_tool_calls") or []
-            return "run" if len(planned) > 0 else "direct"
 
-        workflow.add_conditional_edges(
-            "plan_tools",
-            has_tools,
-            {
-                "run": "run_tools",
-                "direct": "generate_response",
-            }
-        )
-
-        # After running tools, resolve with tools then validate
+        # Response nodes validate their own output, so they end the run
         workflow.add_edge("run_tools", "resolve_with_tools")
-        workflow.add_edge("resolve_with_tools", "validate_response")
-
-        # After generating response (no tools), validate it
-        workflow.add_edge("generate_response", "validate_response")
+        workflow.add_edge("resolve_with_tools", END)
+        workflow.add_edge("generate_response", END)
         # Escalated path ends after generating handoff response
         workflow.add_edge("generate_response_escalated", END)
         
-        # After validation, end
-        workflow.add_edge("validate_response", END)
-        
         log.info("Agent workflow graph built successfully")
         return workflow
     
-    async def process_message(
+    async def aprocess_message(
         self,
         message: str,
         conversation_history: List[Dict[str, Any]] = None,
@@ -152,11 +149,16 @@ class CustomerSupportAgent:
         platform: str | None = None,
         platform_user_id: str | None = None,
     ) -> Dict[str, Any]:
-        """Process an incoming message through the agent workflow."""
+        """Process an incoming message through the agent workflow.
+
+        All nodes are coroutines, so the whole graph runs via ``ainvoke`` on
+        the caller's event loop without bouncing through a thread pool.
+        """
 
         # Initialize state
         initial_state: AgentState = {
             "message": message,
+            "message_lower": "",     # set in classify_message
             "conversation_history": conversation_history or [],
             "intent": "",
             "formatted_context": "",
@@ -210,14 +212,25 @@ class CustomerSupportAgent:
                 "metadata": {"error": str(e)}
             }
 
+    async def process_message(self, *args, **kwargs) -> Dict[str, Any]:
+        """Backward-compatible alias for :meth:`aprocess_message`."""
+        return await self.aprocess_message(*args, **kwargs)
+
+    def process_message_sync(self, *args, **kwargs) -> Dict[str, Any]:
+        """Blocking wrapper for legacy callers without a running event loop."""
+        return asyncio.run(self.aprocess_message(*args, **kwargs))
+
 
 # Global agent instance
 _agent_instance = None
+_agent_lock = threading.Lock()
 
 
 def get_agent() -> CustomerSupportAgent:
-    """Get or create the global agent instance."""
+    """Get or create the global agent instance (built at most once per process)."""
     global _agent_instance
     if _agent_instance is None:
-        _agent_instance = CustomerSupportAgent()
+        with _agent_lock:
+            if _agent_instance is None:
+                _agent_instance = CustomerSupportAgent()
     return _agent_instance
@@ -1,6 +1,11 @@
 """LangGraph agent nodes for message processing."""
 
+import asyncio
+import json
+import random
+import re
 import time
+from functools import cached_property, lru_cache
 from typing import Dict, Any, Optional
 try:
     from langchain_openai import ChatOpenAI
@@ -33,6 +38,7 @@ from app.agent.prompts import (
     MOCK_RESPONSES
 )
 from app.agent.tools import (
+    classify_by_keywords,
     detect_urgency,
     extract_sentiment_indicators,
     format_context,
@@ -56,14 +62,93 @@ except Exception:
 
 
 from app.integrations.llm_router import get_llm_cached
+from app.agent.semantic_cache import build_semantic_cache
+
+# Parses the "CLASSIFICATION: <category>" line of the classifier output
+CLASSIFICATION_RE = re.compile(r"CLASSIFICATION:\s*(\w+)", re.IGNORECASE)
+
+
+# Response prompt templates by "<intent>_<variant>" key
+_RESPONSE_PROMPTS = {
+    "support_A": SUPPORT_RESPONSE_PROMPT_A,
+    "support_B": SUPPORT_RESPONSE_PROMPT_B,
+    "sales_A": SALES_RESPONSE_PROMPT_A,
+    "sales_B": SALES_RESPONSE_PROMPT_B,
+    "general_A": GENERAL_RESPONSE_PROMPT_A,
+    "general_B": GENERAL_RESPONSE_PROMPT_B,
+}
+
+def _default_variant() -> str:
+    """Variant used when state carries none; non-A/B settings (auto/random) map to A."""
+    variant = (settings.agent_prompt_variant or "A").strip().upper()
+    return variant if variant in ("A", "B") else "A"
+
+
+# Message keywords that make plan_tools look up orders whatever the intent
+_ORDER_HINTS = ("order", "tracking")
+
+
+def _plans_tools(intent: str, message_lower: str) -> bool:
+    """Whether plan_tools schedules any tools (and so a profile fetch) for a message."""
+    return intent in ("support", "sales") or any(k in message_lower for k in _ORDER_HINTS)
+
+
+# Prompt wrappers return the same string object per input, so the parsed
+# prompt cache lookup in _get_chat_prompt reuses the string's cached hash
+@lru_cache(maxsize=64)
+def _with_language_hint(base_prompt: str, language: str) -> str:
+    """Prefix a prompt template with an answer-language instruction."""
+    return f"You MUST answer in language code '{language}'.\n\n" + base_prompt
+
+
+@lru_cache(maxsize=16)
+def _with_tool_results(base_prompt: str) -> str:
+    """Append the tool-results section to a response prompt template."""
+    return base_prompt + "\n\nAdditional data from tools (JSON): {tool_results}\nUse this data if relevant."
+
 
 class AgentNodes:
     """Agent nodes for LangGraph workflow."""
     
     def __init__(self):
-        """Initialize the agent nodes with LLM client."""
-        self.llm = self._initialize_llm()
+        """Initialize the agent nodes; the LLM client is created on first use."""
+        # Strong references to fire-and-forget tasks until they finish
+        self._background_tasks: set = set()
+        self._classify_prompt = (
+            ChatPromptTemplate.from_template(CLASSIFICATION_PROMPT) if ChatPromptTemplate else None
+        )
+        # Parsed response prompts keyed by final template text (intent/variant/language)
+        self._prompt_cache: Dict[str, Any] = {}
     
+    @cached_property
+    def llm(self):
+        """LLM client, resolved lazily from the shared router cache."""
+        return self._initialize_llm()
+
+    @cached_property
+    def classifier_llm(self):
+        """LLM used for intent classification.
+
+        Uses the smaller ``agent_classifier_model`` (temperature 0, short
+        output) when configured, otherwise the main response LLM.
+        """
+        if not settings.agent_classifier_model or not self.llm:
+            return self.llm
+        try:
+            return get_llm_cached(
+                model_name=settings.agent_classifier_model,
+                temperature=0.0,
+                max_tokens=settings.agent_classifier_max_tokens,
+            )
+        except Exception as e:
+            log.error(f"Failed to initialize classifier LLM: {e}. Using the response LLM.")
+            return self.llm
+
+    @cached_property
+    def semantic_cache(self):
+        """Classification semantic cache, only built when an LLM is available."""
+        return build_semantic_cache() if self.llm else None
+
     def _initialize_llm(self):
         """Initialize LLM based on configuration using the model router."""
         try:
@@ -78,9 +163,23 @@ class AgentNodes:
             log.error(f"Failed to initialize LLM: {e}. Falling back to mock responses.")
             return None
 
-    async def _invoke_with_tools(self, messages) -> str:
-        """Invoke LLM with optional tool bindings and handle one round of tool calls."""
-        if not self.llm:
+    def _get_chat_prompt(self, template: str):
+        """Return a parsed prompt for the template, parsing each template once."""
+        prompt = self._prompt_cache.get(template)
+        if prompt is None:
+            prompt = ChatPromptTemplate.from_template(template)
+            self._prompt_cache[template] = prompt
+        return prompt
+
+    async def _invoke_with_tools(self, messages, llm=None) -> str:
+        """Invoke LLM with optional tool bindings and handle one round of tool calls.
+
+        Args:
+            messages: Prompt messages to send.
+            llm: Client to use instead of the main response LLM.
+        """
+        llm = llm or self.llm
+        if not llm:
             raise RuntimeError("LLM not initialized")
 
         tools = []
@@ -89,45 +188,45 @@ class AgentNodes:
         except Exception:
             tools = []
 
-        llm_runner = self.llm
+        llm_runner = llm
         if tools:
             try:
-                llm_runner = self.llm.bind_tools(tools)
+                llm_runner = llm.bind_tools(tools)
             except Exception as e:
                 log.error(f"Failed to bind tools to LLM: {e}")
-                llm_runner = self.llm
+                llm_runner = llm
 
         # First pass with timing
-        log.info("LLM invocation starting (provider=%s).", settings.llm_provider)
+        log.info("LLM invocation starting (provider={}).", settings.llm_provider)
         start = time.time()
         resp = await llm_runner.ainvoke(messages)
         duration = time.time() - start
         resp_content = getattr(resp, "content", None)
         resp_preview = (resp_content or str(resp))[:200]
-        log.info("LLM returned in %.2fs. preview=%s", duration, resp_preview)
+        log.info("LLM returned in {:.2f}s. preview={}", duration, resp_preview)
 
         # If tool calls present and we can construct ToolMessage, execute and do a second pass
         try:
             tool_calls = getattr(resp, "tool_calls", None)
             if tool_calls and ToolMessage is not None:
-                log.info("LLM requested %d tool call(s), executing...", len(tool_calls))
+                log.info("LLM requested {} tool call(s), executing...", len(tool_calls))
+                # Registry tools are fast sync helpers; run them inline in call order
                 tool_msgs = []
                 for call in tool_calls:
-                    name = call.get("name")
-                    args = call.get("args", {})
                     call_id = call.get("id")
                     try:
-                        result = execute_tool_call(name, args)
+                        result = execute_tool_call(call.get("name"), call.get("args", {}))
+                    except Exception as e:
+                        tool_msgs.append(ToolMessage(content=f"ERROR: {e}", tool_call_id=call_id))
+                    else:
                         tool_msgs.append(ToolMessage(content=str(result), tool_call_id=call_id))
-                    except Exception as te:
-                        tool_msgs.append(ToolMessage(content=f"ERROR: {te}", tool_call_id=call_id))
                 # Re-invoke with tool results appended
                 log.info("Re-invoking LLM with tool results...")
                 start2 = time.time()
                 final = await llm_runner.ainvoke([*messages, resp, *tool_msgs])
                 dur2 = time.time() - start2
                 final_content = getattr(final, "content", str(final))[:200]
-                log.info("LLM final returned in %.2fs. preview=%s", dur2, final_content)
+                log.info("LLM final returned in {:.2f}s. preview={}", dur2, final_content)
                 return getattr(final, "content", str(final))
         except Exception as e:
             log.error(f"Tool call handling failed: {e}")
@@ -147,10 +246,13 @@ class AgentNodes:
         log.info("Classifying message intent")
         
         message = state.get("message", "")
+        # Normalize once; later keyword checks and check_escalation reuse it
+        message_lower = message.lower().strip()
+        state["message_lower"] = message_lower
         
         # Language detection
         if settings.agent_auto_detect_language:
-            lang = detect_language(message)
+            lang = detect_language(message, text_lower=message_lower)
         else:
             lang = settings.agent_default_language
         state["language"] = lang
@@ -167,7 +269,6 @@ class AgentNodes:
             variant = sticky_pref
         elif variant_setting == "random":
             # Uniform random split
-            import random
             variant = random.choice(["A", "B"])
         elif variant_setting == "auto":
             # Choose variant B for non-English languages to test alternative phrasing
@@ -178,60 +279,96 @@ class AgentNodes:
 
         state["prompt_variant"] = variant
 
+        # Formatted once here; retrieve_context reuses it
         context = format_context(state.get("conversation_history", []))
+        state["formatted_context"] = context
         
-        # Check for urgency first
+        # Check for urgency first; the handoff reply is fixed, so the graph
+        # ends right after this node (see route_after_classify)
         if detect_urgency(message):
-            log.warning(f"Urgent message detected: {message[:50]}...")
+            log.warning("Urgent message detected: {}...", message[:50])
             state["intent"] = "urgent"
             state["requires_escalation"] = True
+            state["escalation_reason"] = "Urgent issue requiring immediate human attention"
+            state["sentiment_score"] = extract_sentiment_indicators(message, message_lower)
+            state["response"] = ESCALATION_MESSAGE
             return state
         
         # Use LLM for classification if available
         if self.llm:
+            # Near-duplicate messages reuse a cached classification. The cache
+            # is keyed by the message alone, so it is only consulted for
+            # first-turn messages where the prompt context is empty. Verbatim
+            # repeats hit the exact key without an embedding call.
+            cache_vec = None
+            if self.semantic_cache is not None and not state.get("conversation_history"):
+                hit = self.semantic_cache.get_exact(message_lower)
+                if not hit:
+                    try:
+                        cache_vec = await self.semantic_cache.embed(message)
+                        hit = self.semantic_cache.search(cache_vec)
+                    except Exception as e:
+                        log.error(f"Semantic cache lookup failed: {e}")
+                        cache_vec, hit = None, None
+                if hit:
+                    state["intent"], state["classification_reason"] = hit
+                    log.info("Message classified from semantic cache as: {}", state["intent"])
+                    return state
+
+            prefetch = self._prefetch_profile(state)
+            response_text = ""
             try:
-                log.info("Calling LLM for classification (provider=%s).", settings.llm_provider)
-                prompt = ChatPromptTemplate.from_template(CLASSIFICATION_PROMPT)
-                messages = prompt.format_messages(message=message, context=context)
-                response_text = await self._invoke_with_tools(messages)
-                log.info("Classification LLM response preview: %s", (response_text or "")[:200])
-                if "CLASSIFICATION:" in response_text:
-                    intent_line = [line for line in response_text.split("\n") if "CLASSIFICATION:" in line][0]
-                    intent = intent_line.split(":")[1].strip().lower()
-                    state["intent"] = intent
-                    state["classification_reason"] = response_text
-                else:
-                    # Fallback to rule-based
-                    state["intent"] = self._rule_based_classification(message)
-                    
+                log.info("Calling LLM for classification (provider={}).", settings.llm_provider)
+                messages = self._classify_prompt.format_messages(message=message, context=context)
+                response_text = await self._invoke_with_tools(messages, llm=self.classifier_llm) or ""
+                log.info("Classification LLM response preview: {}", response_text[:200])
             except Exception as e:
                 log.error(f"LLM classification failed: {e}")
-                state["intent"] = self._rule_based_classification(message)
+
+            match = CLASSIFICATION_RE.search(response_text)
+            if match:
+                intent = match.group(1).lower()
+                state["intent"] = intent
+                state["classification_reason"] = response_text
+                if cache_vec is not None and intent != "urgent":
+                    self.semantic_cache.add(cache_vec, intent, response_text, key=message_lower)
+            else:
+                # Fallback to rule-based
+                state["intent"] = self._rule_based_classification(message, message_lower)
+            if prefetch is not None and not _plans_tools(state["intent"], message_lower):
+                # No fetch_profile step will be planned; drop the upstream call
+                prefetch.cancel()
         else:
             # Rule-based classification
-            state["intent"] = self._rule_based_classification(message)
+            state["intent"] = self._rule_based_classification(message, message_lower)
         
-        log.info(f"Message classified as: {state['intent']} (lang={state['language']}, variant={state['prompt_variant']})")
+        log.info("Message classified as: {} (lang={}, variant={})", state["intent"], state["language"], state["prompt_variant"])
         return state
     
-    def _rule_based_classification(self, message: str) -> str:
+    def _prefetch_profile(self, state: Dict[str, Any]) -> Optional[asyncio.Task]:
+        """Start the platform profile fetch while the classifier LLM runs.
+
+        fetch_profile shares in-flight calls and caches results, so a later
+        fetch_profile in run_tools joins this task instead of calling the
+        platform again. The caller cancels the returned task once the intent
+        shows plan_tools will not schedule fetch_profile.
+        """
+        platform = state.get("platform")
+        platform_user_id = state.get("platform_user_id")
+        if not platform or not platform_user_id:
+            return None
+        task = asyncio.create_task(fetch_profile(platform, platform_user_id))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    def _rule_based_classification(self, message: str, message_lower: Optional[str] = None) -> str:
         """Fallback rule-based classification."""
-        message_lower = message.lower()
-        
-        # Sales keywords
-        sales_keywords = ['price', 'pricing', 'cost', 'buy', 'purchase', 'plan', 'enterprise', 'demo']
-        if any(keyword in message_lower for keyword in sales_keywords):
-            return "sales"
-        
-        # Support keywords
-        support_keywords = ['order', 'tracking', 'issue', 'problem', 'help', 'support', 'not working']
-        if any(keyword in message_lower for keyword in support_keywords):
-            return "support"
-        
-        # Default to general
-        return "general"
+        if message_lower is None:
+            message_lower = message.lower().strip()
+        return classify_by_keywords(message_lower)
     
-    def retrieve_context(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def retrieve_context(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Retrieve and format conversation context.
         
@@ -243,11 +380,28 @@ class AgentNodes:
         """
         log.info("Retrieving conversation context")
         
-        conversation_history = state.get("conversation_history", [])
-        state["formatted_context"] = format_context(conversation_history)
+        # classify_message normally formatted the history already
+        if not state.get("formatted_context"):
+            conversation_history = state.get("conversation_history", [])
+            state["formatted_context"] = format_context(conversation_history)
         
         return state
 
+    async def gather_context(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Format context, check escalation and plan tools in a single graph step.
+
+        Neither context nor escalation reads the other's output and all three
+        steps are cheap local work, so they run back to back in one node. Tool
+        planning is skipped for escalated messages, which never use tools.
+        The graph then routes on ``requires_escalation`` and
+        ``planned_tool_calls`` with a single branch.
+        """
+        await self.retrieve_context(state)
+        await self.check_escalation(state)
+        if not state.get("requires_escalation"):
+            await self.plan_tools(state)
+        return state
+
     async def plan_tools(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Plan which tools to run based on intent and message.
 
@@ -259,9 +413,17 @@ class AgentNodes:
         intent = state.get("intent", "")
         platform = state.get("platform", "")
         platform_user_id = state.get("platform_user_id", "")
+        message_lower = state.get("message_lower") or message.lower()
+        has_order_hint = any(k in message_lower for k in _ORDER_HINTS)
+
+        # Fast path: general chatter without order hints needs no tools, which
+        # also skips the profile fetch and the tool-augmented LLM pass
+        if not _plans_tools(intent, message_lower):
+            state["planned_tool_calls"] = planned
+            return state
 
         # If support-related, attempt to extract order number and maybe lookup status
-        if intent == "support" or any(k in message.lower() for k in ["order", "tracking"]):
+        if intent == "support" or has_order_hint:
             planned.append({"name": "extract_order_number", "args": {"text": message}})
             # We'll decide to call lookup_order_status after running extract (if found)
         
@@ -273,53 +435,76 @@ class AgentNodes:
         return state
 
     async def run_tools(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute planned tools sequentially and store results in state["tool_results"]."""
+        """Execute planned tools and store results in state["tool_results"].
+
+        Registry tools are fast pure-Python helpers, so they run inline (a
+        worker thread would only add a hop under the GIL), with
+        ``lookup_order_status`` chained onto ``extract_order_number``. Only
+        ``fetch_profile`` does I/O; profile fetches are awaited together
+        afterwards.
+        """
         log.info("Running planned tools")
+        calls = state.get("planned_tool_calls", []) or []
+        profile_calls = [call for call in calls if call.get("name") == "fetch_profile"]
+
         results: Dict[str, Any] = {}
-        for call in state.get("planned_tool_calls", []) or []:
+        for call in calls:
             name = call.get("name")
-            args = call.get("args", {})
+            if name == "fetch_profile":
+                continue
             try:
-                if name == "extract_order_number":
-                    res = execute_tool_call(name, args)
-                    results[name] = res
-                    # If found, also lookup order status
-                    if res:
-                        order_number = res
-                        results["lookup_order_status"] = lookup_order_status(order_number)
-                elif name == "fetch_profile":
-                    platform = args.get("platform")
-                    user_id = args.get("user_id")
-                    res = await fetch_profile(platform, user_id)
-                    results[name] = res
-                else:
-                    # Try registry first (detect_language/sentiment etc.)
-                    res = execute_tool_call(name, args)
-                    results[name] = res
+                results.update(self._run_tool_chain(name, call.get("args", {})))
             except Exception as e:
                 log.error(f"Tool {name} failed: {e}")
                 results[name] = {"error": str(e)}
 
+        outcomes = await asyncio.gather(
+            *(fetch_profile(call.get("args", {}).get("platform"), call.get("args", {}).get("user_id"))
+              for call in profile_calls),
+            return_exceptions=True,
+        )
+        for res in outcomes:
+            if isinstance(res, asyncio.CancelledError):
+                raise res
+            if isinstance(res, BaseException):
+                log.error(f"Tool fetch_profile failed: {res}")
+                results["fetch_profile"] = {"error": str(res)}
+            else:
+                results["fetch_profile"] = res
+
         state["tool_results"] = results
         return state
 
+    def _run_tool_chain(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a planned registry tool call plus any lookup that depends on its result."""
+        # Planned args are built by plan_tools, so schema validation is skipped
+        out = {name: execute_tool_call(name, args, False)}
+        # If an order number was found, also lookup order status
+        order_number = out[name] if name == "extract_order_number" else None
+        if order_number and isinstance(order_number, str):
+            out["lookup_order_status"] = lookup_order_status(order_number)
+        return out
+
     async def resolve_with_tools(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Generate response considering tool results before validation."""
         log.info("Resolving with tool results")
+        tool_results = state.get("tool_results") or {}
+        if not tool_results:
+            # Nothing to add to the prompt; use the plain generation path
+            return await self.generate_response(state)
+
         # Reuse generate_response path but enrich context with tool results JSON
-        import json as _json
-        tool_json = ""
         try:
-            tool_json = _json.dumps(state.get("tool_results", {}))
+            tool_json = json.dumps(tool_results)
         except Exception:
-            tool_json = str(state.get("tool_results", {}))
+            tool_json = str(tool_results)
 
         # Build augmented prompt template by appending tool data
         intent = state.get("intent", "general")
-        language = state.get("language", settings.agent_default_language)
-        variant = state.get("prompt_variant", settings.agent_prompt_variant.upper())
+        language = state.get("language") or settings.agent_default_language
+        variant = state.get("prompt_variant") or _default_variant()
         base_prompt_template = self._get_prompt_for_intent(intent, variant)
-        augmented_template = base_prompt_template + "\n\nAdditional data from tools (JSON): {tool_results}\nUse this data if relevant."
+        augmented_template = _with_tool_results(base_prompt_template)
         prompt_template = self._wrap_prompt_with_language_hint(augmented_template, language)
 
         message = state.get("message", "")
@@ -327,13 +512,13 @@ class AgentNodes:
 
         if self.llm:
             try:
-                log.info("Calling LLM for resolve_with_tools (provider=%s).", settings.llm_provider)
-                prompt = ChatPromptTemplate.from_template(prompt_template)
+                log.info("Calling LLM for resolve_with_tools (provider={}).", settings.llm_provider)
+                prompt = self._get_chat_prompt(prompt_template)
                 messages = prompt.format_messages(message=message, context=context, tool_results=tool_json)
                 final_text = await self._invoke_with_tools(messages)
-                log.info("resolve_with_tools response preview: %s", (final_text or "")[:200])
+                log.info("resolve_with_tools response preview: {}", (final_text or "")[:200])
                 state["response"] = final_text
-                return state
+                return self._validate_response(state)
             except Exception as e:
                 log.error(f"resolve_with_tools LLM failed: {e}")
 
@@ -345,15 +530,7 @@ class AgentNodes:
         Select the correct prompt template for given intent and A/B variant.
         """
         key = select_prompt_variant(intent, variant)
-        mapping = {
-            "support_A": SUPPORT_RESPONSE_PROMPT_A,
-            "support_B": SUPPORT_RESPONSE_PROMPT_B,
-            "sales_A": SALES_RESPONSE_PROMPT_A,
-            "sales_B": SALES_RESPONSE_PROMPT_B,
-            "general_A": GENERAL_RESPONSE_PROMPT_A,
-            "general_B": GENERAL_RESPONSE_PROMPT_B,
-        }
-        return mapping.get(key, GENERAL_RESPONSE_PROMPT_A)
+        return _RESPONSE_PROMPTS.get(key, GENERAL_RESPONSE_PROMPT_A)
     
     def _wrap_prompt_with_language_hint(self, base_prompt: str, language: str) -> str:
         """
@@ -363,8 +540,7 @@ class AgentNodes:
         """
         if not language or language == "en":
             return base_prompt
-        prefix = f"You MUST answer in language code '{language}'.\n\n"
-        return prefix + base_prompt
+        return _with_language_hint(base_prompt, language)
 
     async def generate_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -381,8 +557,8 @@ class AgentNodes:
         intent = state.get("intent", "general")
         message = state.get("message", "")
         context = state.get("formatted_context", "")
-        language = state.get("language", settings.agent_default_language)
-        variant = state.get("prompt_variant", settings.agent_prompt_variant.upper())
+        language = state.get("language") or settings.agent_default_language
+        variant = state.get("prompt_variant") or _default_variant()
         sentiment = state.get("sentiment_score", 0.0)
         
         # Handle urgent/escalation
@@ -400,11 +576,11 @@ class AgentNodes:
         
         if self.llm:
             try:
-                log.info("Calling LLM for generate_response (provider=%s).", settings.llm_provider)
-                prompt = ChatPromptTemplate.from_template(prompt_template)
+                log.info("Calling LLM for generate_response (provider={}).", settings.llm_provider)
+                prompt = self._get_chat_prompt(prompt_template)
                 messages = prompt.format_messages(message=message, context=context)
                 final_text = await self._invoke_with_tools(messages)
-                log.info("generate_response LLM preview: %s", (final_text or "")[:200])
+                log.info("generate_response LLM preview: {}", (final_text or "")[:200])
             except Exception as e:
                 log.error(f"LLM response generation failed: {e}")
                 final_text = MOCK_RESPONSES.get(intent, MOCK_RESPONSES["general"])
@@ -416,10 +592,11 @@ class AgentNodes:
         final_text = adjust_response_for_sentiment(final_text, sentiment)
         
         state["response"] = final_text
-        log.info(f"Response generated: {state['response'][:50]}...")
-        return state
+        log.info("Response generated: {}...", state["response"][:50])
+        # Validate inline rather than as a separate graph step
+        return self._validate_response(state)
     
-    def check_escalation(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def check_escalation(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Determine if human escalation is needed.
 
@@ -435,11 +612,11 @@ class AgentNodes:
             state["requires_escalation"] = True
             state["escalation_reason"] = "Urgent issue requiring immediate human attention"
             # still compute sentiment for analytics & tone
-            state["sentiment_score"] = extract_sentiment_indicators(message)
+            state["sentiment_score"] = extract_sentiment_indicators(message, state.get("message_lower"))
             return state
         
         # Check sentiment
-        sentiment = extract_sentiment_indicators(message)
+        sentiment = extract_sentiment_indicators(message, state.get("message_lower"))
         state["sentiment_score"] = sentiment
         
         if sentiment <= -0.6:
@@ -452,7 +629,7 @@ class AgentNodes:
         
         return state
     
-    def validate_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def validate_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validate the generated response.
         
@@ -462,6 +639,10 @@ class AgentNodes:
         Returns:
             Updated state with validation results
         """
+        return self._validate_response(state)
+    
+    def _validate_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the response quality checks in place (shared by response nodes)."""
         log.info("Validating response")
         
         response = state.get("response", "")
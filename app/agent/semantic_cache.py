@@ -0,0 +1,119 @@
+"""Semantic cache for intent classification results."""
+
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils.logger import log
+
+
+EmbedFn = Callable[[str], Awaitable[List[float]]]
+
+
+class SemanticCache:
+    """In-process cache of (intent, reason) keyed by message embedding similarity.
+
+    Embeddings are L2-normalized so a dot product against the stored matrix
+    gives cosine similarity. A hit above ``threshold`` skips the LLM
+    classification round-trip entirely. Entries may also carry an exact key
+    (the normalized message) so verbatim repeats skip the embedding call too.
+
+    Vectors live in a matrix preallocated to ``max_entries`` rows on first
+    insert. Once full, the least recently used entry's row is overwritten in
+    place, so adds and evictions never copy the matrix.
+    """
+
+    def __init__(self, embed_fn: EmbedFn, threshold: float = 0.92, max_entries: int = 10000):
+        """Initialize the cache.
+
+        Args:
+            embed_fn: Async callable returning an embedding vector for a text.
+            threshold: Minimum cosine similarity for a cache hit.
+            max_entries: Maximum number of cached entries before eviction.
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # Matrix row -> (intent, reason, exact key), in LRU order
+        self._entries: "OrderedDict[int, Tuple[str, str, Optional[str]]]" = OrderedDict()
+        self._exact: Dict[str, int] = {}
+        # Rows [0, len(self._entries)) are occupied; allocated on first add
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_exact(self, key: str) -> Optional[Tuple[str, str]]:
+        """Return the cached (intent, reason) stored under an exact key, if any."""
+        row = self._exact.get(key)
+        if row is None:
+            return None
+        self._entries.move_to_end(row)
+        intent, reason, _ = self._entries[row]
+        return intent, reason
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed and L2-normalize a text."""
+        vec = np.asarray(await self.embed_fn(text), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def search(self, vec: np.ndarray) -> Optional[Tuple[str, str]]:
+        """Return the cached (intent, reason) for the nearest entry, if close enough."""
+        if not self._entries:
+            return None
+        scores = self._matrix[:len(self._entries)] @ vec
+        row = int(np.argmax(scores))
+        if float(scores[row]) < self.threshold:
+            return None
+        self._entries.move_to_end(row)
+        intent, reason, _ = self._entries[row]
+        return intent, reason
+
+    def add(self, vec: np.ndarray, intent: str, reason: str, key: Optional[str] = None) -> None:
+        """Store a classification result for an embedded message (and optional exact key)."""
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+        if len(self._entries) < self.max_entries:
+            row = len(self._entries)
+        else:
+            # Reuse the least recently used entry's row
+            row, (_, _, evicted_key) = self._entries.popitem(last=False)
+            if evicted_key is not None and self._exact.get(evicted_key) == row:
+                del self._exact[evicted_key]
+        self._matrix[row] = vec
+        self._entries[row] = (intent, reason, key)
+        if key is not None:
+            self._exact[key] = row
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+        self._exact.clear()
+
+
+def build_semantic_cache() -> Optional[SemanticCache]:
+    """Create the classification semantic cache if enabled and configured."""
+    if not settings.agent_semantic_cache_enabled:
+        return None
+    try:
+        from langchain_openai import OpenAIEmbeddings
+    except ImportError:
+        log.warning("Semantic cache enabled but langchain_openai is not installed")
+        return None
+    if not settings.openai_api_key:
+        log.warning("Semantic cache enabled but OPENAI_API_KEY is not set")
+        return None
+
+    embeddings = OpenAIEmbeddings(
+        api_key=settings.openai_api_key,
+        model=settings.agent_semantic_cache_embedding_model,
+    )
+    log.info(f"Semantic classification cache enabled (threshold={settings.agent_semantic_cache_threshold})")
+    return SemanticCache(
+        embed_fn=embeddings.aembed_query,
+        threshold=settings.agent_semantic_cache_threshold,
+        max_entries=settings.agent_semantic_cache_max_entries,
+    )
@@ -1,40 +1,55 @@
 """Agent tools and utilities."""
 
-from typing import Optional, Dict, Any, Callable, List
+from typing import Optional, Dict, Any, Callable, List, Tuple
+import asyncio
 import re
 import json
 import hashlib
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from app.config import settings
+from app.integrations import get_platform_client
 from app.utils.logger import log
-from app.integrations.tiktok import TikTokClient
-from app.integrations.linkedin import LinkedInClient
 
 # ============================================================================
 # Core Utilities
 # ============================================================================
 
-def detect_language(text: str) -> str:
+# Keyword hints per language, in tie-break priority order
+LANGUAGE_HINTS = {
+    "es": ["hola", "gracias", "por favor", "ayuda", "pedido"],
+    "fr": ["bonjour", "merci", "s'il vous plaît", "commande", "aide"],
+    "de": ["hallo", "danke", "bitte", "bestellung", "hilfe"],
+}
+_HINT_LANGUAGE = {word: lang for lang, words in LANGUAGE_HINTS.items() for word in words}
+_LANGUAGE_HINT_RE = re.compile("|".join(re.escape(w) for w in _HINT_LANGUAGE))
+
+
+def detect_language(text: str, text_lower: Optional[str] = None) -> str:
     """Detects the language of the given text using keyword heuristics.
 
     Currently distinguishes 'en' (English), 'es' (Spanish), 'fr' (French),
-    and 'de' (German). Falls back to 'en' if no keywords match.
+    and 'de' (German). All hints are found in one regex scan; the language
+    with the most distinct hints wins, ties going to the earlier language
+    in LANGUAGE_HINTS. Falls back to 'en' if no keywords match.
 
     Args:
         text: The input text to analyze.
+        text_lower: Already-lowercased text, if the caller has it.
 
     Returns:
         The detected language code ('en', 'es', 'fr', 'de').
     """
-    t = text.lower()
-    # Spanish hints
-    if any(w in t for w in ["hola", "gracias", "por favor", "ayuda", "pedido"]):
-        return "es"
-    # French hints
-    if any(w in t for w in ["bonjour", "merci", "s'il vous plaît", "commande", "aide"]):
-        return "fr"
-    # German hints
-    if any(w in t for w in ["hallo", "danke", "bitte", "bestellung", "hilfe"]):
-        return "de"
-    return "en"
+    t = text_lower if text_lower is not None else text.lower()
+    hits = set(_LANGUAGE_HINT_RE.findall(t))
+    if not hits:
+        return "en"
+    votes = {lang: 0 for lang in LANGUAGE_HINTS}
+    for word in hits:
+        votes[_HINT_LANGUAGE[word]] += 1
+    return max(votes, key=votes.__getitem__)
 
 
 def select_prompt_variant(base_key: str, variant: str) -> str:
@@ -50,11 +65,12 @@ def select_prompt_variant(base_key: str, variant: str) -> str:
     return f"{base_key}_{variant.upper()}"
 
 
+@lru_cache(maxsize=8192)
 def assign_sticky_ab_variant(platform_user_id: str) -> str:
     """Deterministically assigns an A/B variant based on user ID.
 
     Uses a hash of the user ID to ensure the same user always gets the
-    same variant.
+    same variant. Memoized, since the same users message repeatedly.
 
     Args:
         platform_user_id: The unique user ID from the platform.
@@ -62,9 +78,10 @@ def assign_sticky_ab_variant(platform_user_id: str) -> str:
     Returns:
         'A' or 'B' based on the hash parity.
     """
-    h = hashlib.sha256(platform_user_id.encode('utf-8')).hexdigest()
-    # Use last hex digit parity for split
-    return 'A' if int(h[-1], 16) % 2 == 0 else 'B'
+    digest = hashlib.sha256(platform_user_id.encode('utf-8')).digest()
+    # Parity of the last byte equals the parity of the last hex digit,
+    # so existing users keep their variant
+    return 'A' if digest[-1] & 1 == 0 else 'B'
 
 
 def adjust_response_for_sentiment(response: str, sentiment: float) -> str:
@@ -88,7 +105,7 @@ def adjust_response_for_sentiment(response: str, sentiment: float) -> str:
     return response
 
 
-def extract_sentiment_indicators(text: str) -> float:
+def extract_sentiment_indicators(text: str, text_lower: Optional[str] = None) -> float:
     """
     Extract basic sentiment from text.
     
@@ -96,35 +113,44 @@ def extract_sentiment_indicators(text: str) -> float:
     
     Args:
         text: The text to analyze
+        text_lower: Already-lowercased text, if the caller has it
         
     Returns:
         Sentiment score between -1.0 and 1.0
     """
-    text_lower = text.lower()
-    
-    # Positive indicators
-    positive_words = [
-        'thank', 'thanks', 'great', 'excellent', 'good', 'love', 'happy',
-        'pleased', 'wonderful', 'fantastic', 'perfect', 'amazing'
-    ]
-    
-    # Negative indicators
-    negative_words = [
-        'bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'angry',
-        'frustrated', 'disappointed', 'unacceptable', 'ridiculous', 'pathetic'
-    ]
-    
-    # Urgent/distress indicators
-    urgent_indicators = [
-        '!!!', 'asap', 'immediately', 'urgent', 'emergency', 'critical'
-    ]
-    
-    positive_count = sum(1 for word in positive_words if word in text_lower)
-    negative_count = sum(1 for word in negative_words if word in text_lower)
-    urgent_count = sum(1 for indicator in urgent_indicators if indicator in text_lower)
+    # Scoring only looks at lowercase text, so normalize before the cache lookup
+    if text_lower is None:
+        text_lower = text.lower()
+    return _sentiment_score(text_lower.strip())
+
+
+# Positive indicators
+POSITIVE_WORDS = [
+    'thank', 'thanks', 'great', 'excellent', 'good', 'love', 'happy',
+    'pleased', 'wonderful', 'fantastic', 'perfect', 'amazing'
+]
+
+# Negative indicators
+NEGATIVE_WORDS = [
+    'bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'angry',
+    'frustrated', 'disappointed', 'unacceptable', 'ridiculous', 'pathetic'
+]
+
+# Urgent/distress indicators
+URGENT_INDICATORS = [
+    '!!!', 'asap', 'immediately', 'urgent', 'emergency', 'critical'
+]
+
+
+@lru_cache(maxsize=4096)
+def _sentiment_score(text_lower: str) -> float:
+    """Score normalized text; memoized for repeated messages."""
+    positive_count = sum(1 for word in POSITIVE_WORDS if word in text_lower)
+    negative_count = sum(1 for word in NEGATIVE_WORDS if word in text_lower)
+    urgent_count = sum(1 for indicator in URGENT_INDICATORS if indicator in text_lower)
     
     # Calculate sentiment score
-    score = (positive_count - negative_count - urgent_count) / max(len(text.split()), 1)
+    score = (positive_count - negative_count - urgent_count) / max(len(text_lower.split()), 1)
     
     # Normalize to -1.0 to 1.0 range
     score = max(-1.0, min(1.0, score))
@@ -132,47 +158,90 @@ def extract_sentiment_indicators(text: str) -> float:
     return round(score, 2)
 
 
+@lru_cache(maxsize=4096)
 def detect_urgency(text: str) -> bool:
     """
     Detect if a message indicates urgency requiring human intervention.
     
+    Results are memoized on the raw text (the caps-ratio check is
+    case-sensitive, so the key is not normalized).
+    
     Args:
         text: The message text
         
     Returns:
         True if urgent, False otherwise
     """
-    text_lower = text.lower()
-    
-    # Urgency indicators
-    urgent_keywords = [
-        'ridiculous', 'unacceptable', 'immediately', 'asap', 'urgent',
-        'lawsuit', 'lawyer', 'legal action', 'complain', 'manager',
-        'supervisor', 'charged twice', 'unauthorized', 'fraud'
-    ]
-    
     # Multiple exclamation marks
     if text.count('!') >= 3:
         return True
     
-    # All caps (more than 50% of letters)
-    caps_ratio = sum(1 for c in text if c.isupper()) / max(len([c for c in text if c.isalpha()]), 1)
-    if caps_ratio > 0.5 and len(text) > 10:
+    # Check for urgent keywords
+    text_lower = text.lower()
+    if URGENT_RE.search(text_lower):
         return True
     
-    # Check for urgent keywords
-    for keyword in urgent_keywords:
-        if keyword in text_lower:
+    # All caps (more than 50% of letters); only counted for longer messages
+    if len(text) > 10:
+        caps_ratio = sum(map(str.isupper, text)) / max(sum(map(str.isalpha, text)), 1)
+        if caps_ratio > 0.5:
             return True
     
-    # Very negative sentiment
-    sentiment = extract_sentiment_indicators(text)
+    # Very negative sentiment, reusing the lowercased text
+    sentiment = extract_sentiment_indicators(text, text_lower)
     if sentiment <= -0.5:
         return True
     
     return False
 
 
+# Keyword sets compiled once into single-pass alternations. Matching is
+# substring-based (no word boundaries), same as the original `in` checks.
+SALES_KEYWORDS = ['price', 'pricing', 'cost', 'buy', 'purchase', 'plan', 'enterprise', 'demo']
+SUPPORT_KEYWORDS = ['order', 'tracking', 'issue', 'problem', 'help', 'support', 'not working']
+URGENT_KEYWORDS = [
+    'ridiculous', 'unacceptable', 'immediately', 'asap', 'urgent',
+    'lawsuit', 'lawyer', 'legal action', 'complain', 'manager',
+    'supervisor', 'charged twice', 'unauthorized', 'fraud'
+]
+
+
+def _compile_keywords(keywords: List[str]) -> "re.Pattern[str]":
+    """Compile a keyword list into one alternation regex."""
+    return re.compile("|".join(re.escape(k) for k in keywords))
+
+
+SALES_RE = _compile_keywords(SALES_KEYWORDS)
+SUPPORT_RE = _compile_keywords(SUPPORT_KEYWORDS)
+URGENT_RE = _compile_keywords(URGENT_KEYWORDS)
+
+
+@lru_cache(maxsize=4096)
+def classify_by_keywords(message_lower: str) -> str:
+    """
+    Rule-based intent classification from keyword matches.
+    
+    Args:
+        message_lower: Lowercased, stripped message text
+        
+    Returns:
+        'sales', 'support' or 'general'
+    """
+    if SALES_RE.search(message_lower):
+        return "sales"
+    if SUPPORT_RE.search(message_lower):
+        return "support"
+    return "general"
+
+
+# Order number formats, tried in priority order (compiled once at import)
+ORDER_NUMBER_PATTERNS = [
+    re.compile(r'#?\b[A-Z]{2}\d{6,10}\b', re.IGNORECASE),  # e.g., AB123456
+    re.compile(r'\b\d{8,12}\b'),                           # e.g., 12345678
+    re.compile(r'order[:\s]+([A-Z0-9-]+)', re.IGNORECASE),  # e.g., order: ABC-123
+]
+
+
 def extract_order_number(text: str) -> Optional[str]:
     """
     Extract potential order number from text.
@@ -183,15 +252,8 @@ def extract_order_number(text: str) -> Optional[str]:
     Returns:
         Extracted order number or None
     """
-    # Pattern for order numbers (common formats)
-    patterns = [
-        r'#?\b[A-Z]{2}\d{6,10}\b',  # e.g., AB123456
-        r'\b\d{8,12}\b',             # e.g., 12345678
-        r'order[:\s]+([A-Z0-9-]+)',  # e.g., order: ABC-123
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in ORDER_NUMBER_PATTERNS:
+        match = pattern.search(text)
         if match:
             return match.group(0).strip('#').strip()
     
@@ -272,23 +334,46 @@ _TOOL_REGISTRY: Dict[str, Callable[..., Any]] = {
 }
 
 
-def execute_tool_call(name: str, args: Dict[str, Any]) -> Any:
-    """Execute a tool call by name using the local registry."""
+def execute_tool_call(name: str, args: Dict[str, Any], validate: bool = True) -> Any:
+    """Execute a tool call by name using the local registry.
+
+    Args:
+        name: Registered tool name
+        args: Keyword arguments for the tool
+        validate: Run the LangChain argument schema validation. Pass False
+            for internally planned calls whose arguments are already well-formed
+            to call the underlying function directly.
+
+    Returns:
+        The tool result
+    """
     fn = _TOOL_REGISTRY.get(name)
     if fn is None:
         raise ValueError(f"Unknown tool: {name}")
-    return fn.invoke(args) if hasattr(fn, "invoke") else fn(**args)
+    if validate and hasattr(fn, "invoke"):
+        return fn.invoke(args)
+    return getattr(fn, "func", fn)(**args)
 
 
 # ============================================================================
 # Runtime Tools (async-capable)
 # ============================================================================
 
+# Mock order lifecycle stages used by lookup_order_status
+ORDER_STAGES = (
+    {"status": "processing", "detail": "Your order is being prepared."},
+    {"status": "shipped", "detail": "Your order is on the way."},
+    {"status": "in_transit", "detail": "Carrier has your package."},
+    {"status": "out_for_delivery", "detail": "Out for delivery today."},
+    {"status": "delivered", "detail": "Delivered at destination."},
+)
+
+
 def lookup_order_status(order_number: str) -> Dict[str, Any]:
     """Mock order status lookup.
 
     Simulates an API call to an order management system. The result is
-    deterministic based on the hash of the order number for development purposes.
+    deterministic based on a CRC32 of the order number for development purposes.
 
     Args:
         order_number: The order identifier.
@@ -298,21 +383,25 @@ def lookup_order_status(order_number: str) -> Dict[str, Any]:
     """
     if not order_number:
         return {"found": False}
-    h = int(hashlib.sha256(order_number.encode("utf-8")).hexdigest(), 16)
-    stages = [
-        {"status": "processing", "detail": "Your order is being prepared."},
-        {"status": "shipped", "detail": "Your order is on the way."},
-        {"status": "in_transit", "detail": "Carrier has your package."},
-        {"status": "out_for_delivery", "detail": "Out for delivery today."},
-        {"status": "delivered", "detail": "Delivered at destination."},
-    ]
-    rec = stages[h % len(stages)]
+    # Non-cryptographic hash is enough to pick a mock stage
+    h = zlib.crc32(order_number.encode("utf-8"))
+    rec = ORDER_STAGES[h % len(ORDER_STAGES)]
     return {"found": True, "order_number": order_number, **rec}
 
 
+# Successful profile fetches, keyed by (platform, user_id) -> (expires_at, result)
+_PROFILE_CACHE_MAX_ENTRIES = 10000
+_profile_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# In-flight fetches so concurrent misses for one key share a single upstream call
+_profile_inflight: Dict[Tuple[str, str], "asyncio.Future[Dict[str, Any]]"] = {}
+
+
 async def fetch_profile(platform: str, user_id: str) -> Dict[str, Any]:
     """Fetches a user profile from the specified platform.
 
+    Successful results are cached for ``agent_profile_cache_ttl_seconds``,
+    and concurrent requests for the same user share one upstream call.
+
     Args:
         platform: The platform name ('tiktok' or 'linkedin').
         user_id: The unique user identifier on the platform.
@@ -320,15 +409,44 @@ async def fetch_profile(platform: str, user_id: str) -> Dict[str, Any]:
     Returns:
         A dictionary containing the profile data or an error message.
     """
+    if not platform or not user_id:
+        return {"ok": False, "error": "missing platform or user_id"}
+
+    key = (platform.lower(), user_id)
+    cached = _profile_cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    pending = _profile_inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+    _profile_inflight[key] = future
+    result: Dict[str, Any] = {"ok": False, "error": "profile fetch cancelled"}
+    try:
+        result = await _fetch_profile_uncached(platform, user_id)
+        if result.get("ok"):
+            _profile_cache[key] = (time.monotonic() + settings.agent_profile_cache_ttl_seconds, result)
+            _profile_cache.move_to_end(key)
+            while len(_profile_cache) > _PROFILE_CACHE_MAX_ENTRIES:
+                _profile_cache.popitem(last=False)
+        return result
+    finally:
+        # Waiters always get a result, even if this fetch was cancelled
+        future.set_result(result)
+        _profile_inflight.pop(key, None)
+
+
+async def _fetch_profile_uncached(platform: str, user_id: str) -> Dict[str, Any]:
+    """Fetch a profile from the platform API without caching."""
     try:
-        if not platform or not user_id:
-            return {"ok": False, "error": "missing platform or user_id"}
         if platform.lower() == "tiktok":
-            client = TikTokClient()
+            client = get_platform_client("tiktok")
             data = await client.get_user_info(user_id)
             return {"ok": True, "platform": platform, "profile": data}
         elif platform.lower() == "linkedin":
-            client = LinkedInClient()
+            client = get_platform_client("linkedin")
             data = await client.get_user_profile(user_id)
             return {"ok": True, "platform": platform, "profile": data}
         return {"ok": False, "error": f"unsupported platform: {platform}"}
@@ -2,8 +2,11 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+from pathlib import Path
+import io
+import os
 
 from app.api.dependencies import get_db
 from app.models.schemas import EscalateRequest, OverrideMessageRequest
@@ -106,6 +109,39 @@ async def override_message(
     }
 
 
+def _tail_lines(path: Path, limit: int, chunk_size: int = 8192) -> List[str]:
+    """
+    Return the last ``limit`` lines of a file, reading backwards from the end.
+    
+    Only the tail is read, so memory and I/O stay proportional to ``limit``
+    instead of the file size.
+    
+    Args:
+        path: File to read
+        limit: Number of lines to return
+        chunk_size: Bytes read per backward step
+        
+    Returns:
+        The last lines, oldest first, with line endings kept
+    """
+    if limit <= 0:
+        return []
+    chunks = []
+    newlines = 0
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        # One newline beyond ``limit`` guarantees the oldest kept line is complete
+        while pos > 0 and newlines <= limit:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    text = b"".join(reversed(chunks)).decode("utf-8", errors="replace")
+    return io.StringIO(text, newline=None).readlines()[-limit:]
+
+
 @router.get("/logs")
 async def get_logs(
     level: Optional[str] = Query("INFO"),
@@ -128,27 +164,24 @@ async def get_logs(
     # This is a simplified version
     # In production, you would read from the actual log file
     try:
-        from pathlib import Path
         log_file = Path("logs/app.log")
         
         if log_file.exists():
-            with open(log_file, 'r') as f:
-                lines = f.readlines()
-                # Get last N lines
-                recent_lines = lines[-limit:]
-                
-                # Filter by level if specified
-                if level and level != "ALL":
-                    recent_lines = [
-                        line for line in recent_lines
-                        if f"| {level} " in line or f"| {level}:" in line
-                    ]
-                
-                return {
-                    "logs": recent_lines,
-                    "count": len(recent_lines),
-                    "level": level
-                }
+            # Get last N lines
+            recent_lines = _tail_lines(log_file, limit)
+            
+            # Filter by level if specified
+            if level and level != "ALL":
+                recent_lines = [
+                    line for line in recent_lines
+                    if f"| {level} " in line or f"| {level}:" in line
+                ]
+            
+            return {
+                "logs": recent_lines,
+                "count": len(recent_lines),
+                "level": level
+            }
         else:
             return {
                 "logs": [],
@@ -225,18 +258,16 @@ async def get_agent_status(db: Session = Depends(get_db)):
     Returns:
         Agent status
     """
-    from sqlalchemy import func
+    from sqlalchemy import case, func
     
     log.info("Retrieving agent status")
     
-    # Get conversation counts
-    total_conversations = db.query(func.count(Conversation.id)).scalar()
-    active_conversations = db.query(func.count(Conversation.id)).filter(
-        Conversation.status == ConversationStatus.ACTIVE
-    ).scalar()
-    escalated_conversations = db.query(func.count(Conversation.id)).filter(
-        Conversation.escalated == True
-    ).scalar()
+    # Get conversation counts in a single pass over the table
+    total_conversations, active_conversations, escalated_conversations = db.query(
+        func.count(Conversation.id),
+        func.count(case((Conversation.status == ConversationStatus.ACTIVE, 1))),
+        func.count(case((Conversation.escalated == True, 1))),
+    ).one()
     
     return {
         "status": "healthy",
@@ -1,25 +1,60 @@
 """Analytics endpoints."""
 
+from functools import wraps
 from fastapi import APIRouter, Depends, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import case, func
 from typing import Optional
 from datetime import datetime, timedelta
 
 from app.api.dependencies import get_db
+from app.config import settings
 from app.models.schemas import (
     MetricsResponse,
     ConversationInsightsResponse,
     ConversationInsight,
     EscalationStats
 )
-from app.models.database import Message, Conversation, Analytics, MessageSender, MessageIntent
+from app.models.database import Message, Conversation, Analytics, MessageIntent
+from app.services.analytics import AnalyticsService, get_analytics_cache
 from app.utils.logger import log
 
-router = APIRouter()
+# Dashboards poll these endpoints; orjson serializes the payloads faster
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+def _cached(name: str, ttl_seconds: Optional[int] = None):
+    """
+    Serve an analytics endpoint from the response cache when it is enabled.
+    
+    Keys are built from the endpoint name and the requested date range, so
+    dashboards polling the default window share one entry per TTL.
+    
+    Args:
+        name: Cache key prefix for the endpoint
+        ttl_seconds: TTL override; defaults to ANALYTICS_CACHE_TTL_SECONDS
+    """
+    def decorator(endpoint):
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            cache = get_analytics_cache()
+            if cache is None:
+                return await endpoint(*args, **kwargs)
+            key = cache.make_key(name, kwargs.get("start_date"), kwargs.get("end_date"))
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            result = await endpoint(*args, **kwargs)
+            cache.set(key, jsonable_encoder(result), ttl_seconds)
+            return result
+        return wrapper
+    return decorator
 
 
 @router.get("/metrics", response_model=MetricsResponse)
+@_cached("metrics")
 async def get_metrics(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
@@ -44,52 +79,12 @@ async def get_metrics(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    # Calculate average response time
-    avg_response_time = db.query(func.avg(Message.response_time_ms)).filter(
-        Message.sender_type == MessageSender.AGENT,
-        Message.created_at >= start_date,
-        Message.created_at <= end_date,
-        Message.response_time_ms.isnot(None)
-    ).scalar() or 0.0
-    
-    # Total messages
-    total_messages = db.query(func.count(Message.id)).filter(
-        Message.created_at >= start_date,
-        Message.created_at <= end_date
-    ).scalar()
-    
-    # Total conversations
-    total_conversations = db.query(func.count(Conversation.id)).filter(
-        Conversation.created_at >= start_date,
-        Conversation.created_at <= end_date
-    ).scalar()
-    
-    # Escalation rate
-    total_escalations = db.query(func.count(Conversation.id)).filter(
-        Conversation.escalated == True,
-        Conversation.created_at >= start_date,
-        Conversation.created_at <= end_date
-    ).scalar()
-    
-    escalation_rate = (total_escalations / total_conversations * 100) if total_conversations > 0 else 0.0
-    
-    # Average sentiment
-    avg_sentiment = db.query(func.avg(Message.sentiment_score)).filter(
-        Message.sentiment_score.isnot(None),
-        Message.created_at >= start_date,
-        Message.created_at <= end_date
-    ).scalar()
-    
-    return MetricsResponse(
-        average_response_time_ms=round(avg_response_time, 2),
-        total_messages=total_messages,
-        total_conversations=total_conversations,
-        escalation_rate=round(escalation_rate, 2),
-        average_sentiment=round(avg_sentiment, 2) if avg_sentiment else None
-    )
+    metrics = AnalyticsService(db).calculate_metrics(start_date, end_date)
+    return MetricsResponse(**metrics)
 
 
 @router.get("/conversations", response_model=ConversationInsightsResponse)
+@_cached("conversations")
 async def get_conversation_insights(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
@@ -142,6 +137,7 @@ async def get_conversation_insights(
 
 
 @router.get("/escalations", response_model=EscalationStats)
+@_cached("escalations")
 async def get_escalation_stats(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
@@ -166,31 +162,28 @@ async def get_escalation_stats(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    # Total escalations
-    total_escalations = db.query(func.count(Conversation.id)).filter(
-        Conversation.escalated == True,
-        Conversation.created_at >= start_date,
-        Conversation.created_at <= end_date
-    ).scalar()
-    
-    # Total conversations
-    total_conversations = db.query(func.count(Conversation.id)).filter(
+    # Total escalations and conversations in one pass
+    total_conversations, total_escalations = db.query(
+        func.count(Conversation.id),
+        func.count(case((Conversation.escalated == True, 1)))
+    ).filter(
         Conversation.created_at >= start_date,
         Conversation.created_at <= end_date
-    ).scalar()
+    ).one()
     
     escalation_rate = (total_escalations / total_conversations * 100) if total_conversations > 0 else 0.0
     
-    # Top escalation reasons
+    # Top escalation reasons, ordered by the aggregate expression itself
+    reason_count = func.count(Conversation.id).label('count')
     reasons = db.query(
         Conversation.escalation_reason,
-        func.count(Conversation.id).label('count')
+        reason_count
     ).filter(
         Conversation.escalated == True,
         Conversation.escalation_reason.isnot(None),
         Conversation.created_at >= start_date,
         Conversation.created_at <= end_date
-    ).group_by(Conversation.escalation_reason).order_by(desc('count')).limit(5).all()
+    ).group_by(Conversation.escalation_reason).order_by(reason_count.desc()).limit(5).all()
     
     top_reasons = [
         {"reason": reason, "count": count}
@@ -205,6 +198,7 @@ async def get_escalation_stats(
 
 
 @router.get("/ab_tests")
+@_cached("ab_tests", settings.analytics_ab_cache_ttl_seconds)
 async def get_ab_test_stats(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
@@ -222,11 +216,12 @@ async def get_ab_test_stats(
     if not start_date:
         start_date = end_date - timedelta(days=30)
 
-    # Metrics stored with metric_type='ab_test', metric_value=1.0 for valid, 0.0 otherwise, dimension=variant
+    # Metrics stored with metric_type='ab_test', metric_value=1.0 for valid, 0.0 otherwise, dimension=variant.
+    # Valid outcomes are counted (an exact integer aggregate) rather than summed as floats
     rows = db.query(
         Analytics.dimension,
         func.count(Analytics.id).label('total'),
-        func.sum(Analytics.metric_value).label('valid_count')
+        func.count(case((Analytics.metric_value >= 0.5, 1))).label('valid_count')
     ).filter(
         Analytics.metric_type == 'ab_test',
         Analytics.timestamp >= start_date,
@@ -238,8 +233,8 @@ async def get_ab_test_stats(
         rate = (valid_count / total * 100.0) if total else 0.0
         variants.append({
             "variant": dim or "unknown",
-            "total": int(total or 0),
-            "valid": int(valid_count or 0),
+            "total": total,
+            "valid": valid_count,
             "valid_rate": round(rate, 2)
         })
 
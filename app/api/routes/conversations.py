@@ -2,17 +2,33 @@
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, selectinload
 from sqlalchemy import desc
 
 from app.api.dependencies import get_db
 from app.models.schemas import ConversationResponse
-from app.models.database import Conversation, Platform, ConversationStatus
+from app.models.database import Conversation, Message, Platform, ConversationStatus
 from app.utils.logger import log
 from app.utils.exceptions import ConversationNotFoundError
 
 router = APIRouter()
 
+# Load only the columns ConversationResponse/MessageResponse serialize (keep in
+# sync with app/models/schemas.py); messages come in one IN query per page
+# instead of one query per conversation, without their extra_data payloads
+_RESPONSE_LOAD_OPTIONS = (
+    load_only(
+        Conversation.id, Conversation.user_id, Conversation.platform,
+        Conversation.platform_conversation_id, Conversation.status, Conversation.escalated,
+        Conversation.escalation_reason, Conversation.created_at, Conversation.updated_at,
+        Conversation.closed_at,
+    ),
+    selectinload(Conversation.messages).load_only(
+        Message.id, Message.conversation_id, Message.sender_type, Message.content,
+        Message.intent, Message.sentiment_score, Message.response_time_ms, Message.created_at,
+    ),
+)
+
 
 @router.get("/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
@@ -31,7 +47,7 @@ async def get_conversation(
     """
     log.info(f"Retrieving conversation {conversation_id}")
     
-    conversation = db.query(Conversation).filter(
+    conversation = db.query(Conversation).options(*_RESPONSE_LOAD_OPTIONS).filter(
         Conversation.id == conversation_id
     ).first()
     
@@ -43,8 +59,8 @@ async def get_conversation(
 
 @router.get("/", response_model=List[ConversationResponse])
 async def list_conversations(
-    platform: Optional[str] = Query(None),
-    status: Optional[str] = Query(None),
+    platform: Optional[Platform] = Query(None),
+    status: Optional[ConversationStatus] = Query(None),
     escalated: Optional[bool] = Query(None),
     priority: Optional[str] = Query(None),
     assigned_to: Optional[int] = Query(None),
@@ -70,22 +86,13 @@ async def list_conversations(
     """
     log.info(f"Listing conversations (platform={platform}, status={status})")
     
-    query = db.query(Conversation)
+    query = db.query(Conversation).options(*_RESPONSE_LOAD_OPTIONS)
     
-    # Apply filters using enums where possible
+    # Apply filters (platform/status are validated as enums by FastAPI)
     if platform:
-        try:
-            platform_enum = Platform(platform)
-            query = query.filter(Conversation.platform == platform_enum)
-        except ValueError:
-            # Invalid platform string, return empty list
-            return []
+        query = query.filter(Conversation.platform == platform)
     if status:
-        try:
-            status_enum = ConversationStatus(status)
-            query = query.filter(Conversation.status == status_enum)
-        except ValueError:
-            return []
+        query = query.filter(Conversation.status == status)
     if escalated is not None:
         query = query.filter(Conversation.escalated == escalated)
     if priority:
@@ -1,6 +1,9 @@
 """OAuth endpoints for LinkedIn (and scaffolding for TikTok if applicable)."""
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from urllib.parse import urlencode
@@ -12,13 +15,68 @@ from app.config import settings
 from typing import Optional
 import json
 from datetime import timedelta
-try:
-    import requests
-except Exception:
-    requests = None
+import httpx
 
 router = APIRouter()
 
+
+def _store_credentials(
+    db: Session,
+    platform: Platform,
+    platform_user_id: str,
+    access_token: str,
+    refresh_token: Optional[str],
+    expires_at: Optional[datetime],
+) -> None:
+    """Create the user if needed and store OAuth credentials in one transaction.
+
+    The user is upserted with INSERT ... ON CONFLICT DO NOTHING, so a new user
+    costs one statement and concurrent callbacks for the same user cannot
+    collide on the unique platform_user_id.
+    """
+    insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+    user_id = db.execute(
+        insert(User)
+        .values(platform=platform, platform_user_id=platform_user_id)
+        .on_conflict_do_nothing(index_elements=[User.platform_user_id])
+        .returning(User.id)
+    ).scalar()
+    if user_id is None:
+        # Already existed; nothing was inserted
+        user_id = db.query(User.id).filter(User.platform_user_id == platform_user_id).scalar()
+
+    db.add(Credentials(
+        user_id=user_id,
+        platform=platform,
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expires_at=expires_at,
+    ))
+    db.commit()
+
+# Shared async client: token exchanges don't block the event loop and reuse
+# pooled keep-alive connections instead of a fresh TCP+TLS handshake each time
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client for OAuth token exchanges, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (called on application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 LINKEDIN_AUTH_URL = "https://www.linkedin.com/oauth/v2/authorization"
 LINKEDIN_TOKEN_URL = "https://www.linkedin.com/oauth/v2/accessToken"
 
@@ -57,28 +115,27 @@ async def linkedin_oauth_callback(
     refresh_token: Optional[str] = None
     expires_at = None
 
-    # Try real token exchange if requests is available
-    if requests is not None:
-        try:
-            data = {
-                "grant_type": "authorization_code",
-                "code": code,
-                "redirect_uri": redirect_uri,
-                "client_id": settings.linkedin_client_id,
-                "client_secret": settings.linkedin_client_secret,
-            }
-            headers = {"Content-Type": "application/x-www-form-urlencoded"}
-            resp = requests.post(LINKEDIN_TOKEN_URL, data=data, headers=headers, timeout=10)
-            if resp.status_code == 200:
-                payload = resp.json()
-                access_token = payload.get("access_token")
-                refresh_token = payload.get("refresh_token")  # LinkedIn may not always return this
-                expires_in = payload.get("expires_in", 3600)
-                expires_at = datetime.utcnow() + timedelta(seconds=int(expires_in))
-            else:
-                log.warning(f"LinkedIn token exchange failed: {resp.status_code} {resp.text}")
-        except Exception as e:
-            log.error(f"LinkedIn token exchange error: {e}")
+    # Try real token exchange
+    try:
+        data = {
+            "grant_type": "authorization_code",
+            "code": code,
+            "redirect_uri": redirect_uri,
+            "client_id": settings.linkedin_client_id,
+            "client_secret": settings.linkedin_client_secret,
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        resp = await get_http_client().post(LINKEDIN_TOKEN_URL, data=data, headers=headers)
+        if resp.status_code == 200:
+            payload = resp.json()
+            access_token = payload.get("access_token")
+            refresh_token = payload.get("refresh_token")  # LinkedIn may not always return this
+            expires_in = payload.get("expires_in", 3600)
+            expires_at = datetime.utcnow() + timedelta(seconds=int(expires_in))
+        else:
+            log.warning(f"LinkedIn token exchange failed: {resp.status_code} {resp.text}")
+    except Exception as e:
+        log.error(f"LinkedIn token exchange error: {e}")
 
     # Fallback to mock tokens if real exchange failed
     if not access_token:
@@ -86,24 +143,10 @@ async def linkedin_oauth_callback(
         refresh_token = f"mock_refresh_token_{platform_user_id}"
         expires_at = datetime.utcnow() + timedelta(hours=1)
 
-    # Ensure user exists
-    user = db.query(User).filter(User.platform_user_id == platform_user_id).first()
-    if not user:
-        user = User(platform=Platform.LINKEDIN, platform_user_id=platform_user_id)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    # Store credentials
-    cred = Credentials(
-        user_id=user.id,
-        platform=Platform.LINKEDIN,
-        access_token=access_token,
-        refresh_token=refresh_token,
-        expires_at=expires_at,
+    # Ensure user exists and store credentials (blocking DB work off the event loop)
+    await run_in_threadpool(
+        _store_credentials, db, Platform.LINKEDIN, platform_user_id, access_token, refresh_token, expires_at
     )
-    db.add(cred)
-    db.commit()
 
     log.info(f"Stored LinkedIn OAuth credentials for user {platform_user_id}")
     return {"status": "success", "access_token": access_token, "expires_at": expires_at}
@@ -148,31 +191,30 @@ async def tiktok_oauth_callback(
     refresh_token: Optional[str] = None
     expires_at = None
 
-    # Try real token exchange if requests is available
-    if requests is not None:
-        try:
-            data = {
-                "client_key": settings.tiktok_client_key,
-                "client_secret": settings.tiktok_client_secret,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": redirect_uri
-            }
-            headers = {"Content-Type": "application/json"}
-            resp = requests.post(TIKTOK_TOKEN_URL, json=data, headers=headers, timeout=10)
-            if resp.status_code == 200:
-                payload = resp.json()
-                # TikTok API response structure
-                if payload.get("data"):
-                    data_obj = payload["data"]
-                    access_token = data_obj.get("access_token")
-                    refresh_token = data_obj.get("refresh_token")
-                    expires_in = data_obj.get("expires_in", 3600)
-                    expires_at = datetime.utcnow() + timedelta(seconds=int(expires_in))
-            else:
-                log.warning(f"TikTok token exchange failed: {resp.status_code} {resp.text}")
-        except Exception as e:
-            log.error(f"TikTok token exchange error: {e}")
+    # Try real token exchange
+    try:
+        data = {
+            "client_key": settings.tiktok_client_key,
+            "client_secret": settings.tiktok_client_secret,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": redirect_uri
+        }
+        headers = {"Content-Type": "application/json"}
+        resp = await get_http_client().post(TIKTOK_TOKEN_URL, json=data, headers=headers)
+        if resp.status_code == 200:
+            payload = resp.json()
+            # TikTok API response structure
+            if payload.get("data"):
+                data_obj = payload["data"]
+                access_token = data_obj.get("access_token")
+                refresh_token = data_obj.get("refresh_token")
+                expires_in = data_obj.get("expires_in", 3600)
+                expires_at = datetime.utcnow() + timedelta(seconds=int(expires_in))
+        else:
+            log.warning(f"TikTok token exchange failed: {resp.status_code} {resp.text}")
+    except Exception as e:
+        log.error(f"TikTok token exchange error: {e}")
 
     # Fallback to mock tokens if real exchange failed
     if not access_token:
@@ -180,24 +222,10 @@ async def tiktok_oauth_callback(
         refresh_token = f"mock_tiktok_refresh_{platform_user_id}"
         expires_at = datetime.utcnow() + timedelta(hours=1)
 
-    # Ensure user exists
-    user = db.query(User).filter(User.platform_user_id == platform_user_id).first()
-    if not user:
-        user = User(platform=Platform.TIKTOK, platform_user_id=platform_user_id)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-    # Store credentials
-    cred = Credentials(
-        user_id=user.id,
-        platform=Platform.TIKTOK,
-        access_token=access_token,
-        refresh_token=refresh_token,
-        expires_at=expires_at,
+    # Ensure user exists and store credentials (blocking DB work off the event loop)
+    await run_in_threadpool(
+        _store_credentials, db, Platform.TIKTOK, platform_user_id, access_token, refresh_token, expires_at
     )
-    db.add(cred)
-    db.commit()
 
     log.info(f"Stored TikTok OAuth credentials for user {platform_user_id}")
     return {"status": "success", "access_token": access_token, "expires_at": expires_at}
@@ -1,12 +1,16 @@
 """Webhook endpoints for TikTok and LinkedIn."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.api.dependencies import get_db
+from app.integrations import get_platform_client
 from app.models.schemas import TikTokWebhook, LinkedInWebhook
-from app.models.database import Platform
+from app.models.database import Message, Platform
 from app.services.message_processor import process_incoming_message
 from app.services.tasks import process_incoming_message_task
 from fastapi import Header
@@ -15,9 +19,15 @@ from app.utils.logger import log
 router = APIRouter()
 
 
+def _find_message_id(db: Session, platform_message_id: str) -> Optional[int]:
+    """Return the id of an already stored message with this platform id, if any."""
+    return db.query(Message.id).filter(Message.platform_message_id == platform_message_id).scalar()
+
+
 @router.post("/tiktok")
 async def tiktok_webhook(
     webhook_data: TikTokWebhook,
+    request: Request,
     db: Session = Depends(get_db),
     x_signature: str | None = Header(default=None)
 ):
@@ -26,6 +36,7 @@ async def tiktok_webhook(
     
     Args:
         webhook_data: TikTok webhook payload
+        request: Raw request; the signature covers its exact body bytes
         db: Database session
         
     Returns:
@@ -35,20 +46,18 @@ async def tiktok_webhook(
     
     try:
         # Require signature
-        from app.integrations.tiktok import TikTokClient
-        client = TikTokClient()
+        client = get_platform_client(Platform.TIKTOK)
         if not x_signature:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing signature header")
-        if not client.verify_webhook_signature(payload=webhook_data.model_dump_json(), signature=x_signature):
+        if not client.verify_webhook_signature(payload=await request.body(), signature=x_signature):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
 
-        # Check for duplicate message (deduplication)
-        from app.models.database import Message
+        # Check for duplicate message (deduplication); the sync query runs off the event loop
         platform_msg_id = f"tiktok_{webhook_data.conversation_id}_{webhook_data.timestamp or 0}"
-        existing_msg = db.query(Message).filter(Message.platform_message_id == platform_msg_id).first()
-        if existing_msg:
+        existing_id = await run_in_threadpool(_find_message_id, db, platform_msg_id)
+        if existing_id is not None:
             log.info(f"Duplicate TikTok message detected: {platform_msg_id}")
-            return {"status": "accepted", "internal_id": existing_msg.id}
+            return {"status": "accepted", "internal_id": existing_id}
 
         # Enqueue for async processing via Celery
         process_incoming_message_task.delay(
@@ -79,6 +88,7 @@ async def tiktok_webhook(
 @router.post("/linkedin")
 async def linkedin_webhook(
     webhook_data: LinkedInWebhook,
+    request: Request,
     db: Session = Depends(get_db),
     x_signature: str | None = Header(default=None)
 ):
@@ -87,6 +97,7 @@ async def linkedin_webhook(
     
     Args:
         webhook_data: LinkedIn webhook payload
+        request: Raw request; the signature covers its exact body bytes
         db: Database session
         
     Returns:
@@ -96,20 +107,18 @@ async def linkedin_webhook(
     
     try:
         # Require signature
-        from app.integrations.linkedin import LinkedInClient
-        client = LinkedInClient()
+        client = get_platform_client(Platform.LINKEDIN)
         if not x_signature:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing signature header")
-        if not client.verify_webhook_signature(payload=webhook_data.model_dump_json(), signature=x_signature):
+        if not client.verify_webhook_signature(payload=await request.body(), signature=x_signature):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
 
-        # Check for duplicate message (deduplication)
-        from app.models.database import Message
+        # Check for duplicate message (deduplication); the sync query runs off the event loop
         platform_msg_id = f"linkedin_{webhook_data.conversation_id}_{webhook_data.timestamp or 0}"
-        existing_msg = db.query(Message).filter(Message.platform_message_id == platform_msg_id).first()
-        if existing_msg:
+        existing_id = await run_in_threadpool(_find_message_id, db, platform_msg_id)
+        if existing_id is not None:
             log.info(f"Duplicate LinkedIn message detected: {platform_msg_id}")
-            return {"status": "accepted", "internal_id": existing_msg.id}
+            return {"status": "accepted", "internal_id": existing_id}
 
         # Enqueue for async processing via Celery
         extra = {
@@ -37,6 +37,14 @@ class Settings(BaseSettings):
     agent_prompt_variant: str = "A"  # Options: A, B (for A/B testing)
     agent_default_language: str = "en"
     agent_auto_detect_language: bool = True
+    agent_semantic_cache_enabled: bool = False  # requires OPENAI_API_KEY for embeddings
+    agent_semantic_cache_threshold: float = 0.92
+    agent_semantic_cache_max_entries: int = 10000
+    agent_semantic_cache_embedding_model: str = "text-embedding-3-small"
+    agent_classifier_model: Optional[str] = None  # smaller model for intent classification (same provider)
+    agent_classifier_max_tokens: int = 64
+    agent_profile_cache_ttl_seconds: int = 300  # cache successful fetch_profile results
+    agent_llm_cache: str = "none"  # Options: none, memory, redis (exact-prompt LLM response cache)
 
     # TikTok Integration
     tiktok_client_key: Optional[str] = None
@@ -62,6 +70,11 @@ class Settings(BaseSettings):
     # Monitoring
     enable_metrics: bool = True
 
+    # Analytics
+    analytics_cache: str = "none"  # Options: none, memory, redis (cache analytics endpoint responses)
+    analytics_cache_ttl_seconds: int = 300
+    analytics_ab_cache_ttl_seconds: int = 3600  # A/B summaries are trailing and change slowly
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
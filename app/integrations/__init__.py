@@ -1 +1,27 @@
 """Integrations package initialization."""
+
+from typing import Any, Dict
+
+_clients: Dict[str, Any] = {}
+
+
+def get_platform_client(platform: str) -> Any:
+    """Return the shared client for 'tiktok' or 'linkedin', creating it on first use.
+
+    Each client owns a Redis connection pool for rate limiting, so one
+    instance per process is reused instead of one per request.
+    """
+    platform = getattr(platform, "value", platform).lower()
+    client = _clients.get(platform)
+    if client is None:
+        # Imported on first use; the clients pull in redis for rate limiting
+        if platform == "tiktok":
+            from app.integrations.tiktok import TikTokClient
+            client = TikTokClient()
+        elif platform == "linkedin":
+            from app.integrations.linkedin import LinkedInClient
+            client = LinkedInClient()
+        else:
+            raise ValueError(f"Unknown platform: {platform}")
+        _clients[platform] = client
+    return client
@@ -1,12 +1,12 @@
 """LinkedIn API integration (Mock implementation for development)."""
 
-from typing import Optional
+from typing import Optional, Union
 import asyncio
 from app.config import settings
 from app.utils.logger import log
 from app.utils.ratelimiter import RedisRateLimiter
+from app.utils.signing import hmac_sha256_hexdigest
 import hmac
-import hashlib
 
 
 class LinkedInClient:
@@ -108,14 +108,14 @@ class LinkedInClient:
     
     def verify_webhook_signature(
         self,
-        payload: str,
+        payload: Union[str, bytes],
         signature: str
     ) -> bool:
         """
         Verify LinkedIn webhook signature.
         
         Args:
-            payload: Webhook payload
+            payload: Raw webhook request body
             signature: Signature from headers
             
         Returns:
@@ -124,7 +124,7 @@ class LinkedInClient:
         try:
             if not self.client_secret or not signature:
                 return False
-            mac = hmac.new(self.client_secret.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+            mac = hmac_sha256_hexdigest(self.client_secret, payload)
             return hmac.compare_digest(mac, signature)
         except Exception:
             return False
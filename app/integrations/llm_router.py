@@ -1,7 +1,7 @@
 """LLM Model Routing - Centralized model management for OpenRouter, ChatGPT, and Claude."""
 
 import os
-from typing import Optional, Any
+from typing import Any, Dict, Optional, Tuple
 from dotenv import load_dotenv
 from langchain_core.utils.utils import secret_from_env
 from pydantic import Field, SecretStr
@@ -220,14 +220,50 @@ def get_llm(provider: Optional[str] = None, **kwargs) -> Any:
         )
 
 
-# Singleton instance for reuse
-_llm_instance = None
-_llm_provider = None
+_llm_cache_installed = False
+
+
+def install_llm_cache() -> None:
+    """
+    Install LangChain's global LLM response cache once, per settings.agent_llm_cache.
+    
+    Identical prompts sent to the same model configuration are then answered
+    from the cache ("memory" per process, "redis" shared across workers).
+    """
+    global _llm_cache_installed
+    if _llm_cache_installed:
+        return
+    _llm_cache_installed = True
+    
+    backend = (settings.agent_llm_cache or "none").lower().strip()
+    if backend == "none":
+        return
+    try:
+        from langchain_core.globals import set_llm_cache
+        from langchain_community.cache import InMemoryCache, RedisCache
+    except ImportError:
+        log.warning("LLM response cache requested but langchain_community is not installed")
+        return
+    
+    if backend == "memory":
+        set_llm_cache(InMemoryCache())
+    elif backend == "redis":
+        import redis
+        set_llm_cache(RedisCache(redis_=redis.Redis.from_url(settings.redis_url)))
+    else:
+        log.warning(f"Unknown AGENT_LLM_CACHE backend: {backend}; LLM response cache disabled")
+        return
+    log.info(f"LLM response cache enabled (backend={backend})")
+
+
+# Shared instances keyed by provider and constructor arguments, so every
+# AgentNodes (tests, reloaders) reuses the same client and connection pool
+_llm_instances: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Any] = {}
 
 
 def get_llm_cached(provider: Optional[str] = None, **kwargs) -> Any:
     """
-    Get cached LLM instance. Creates new instance if provider changed.
+    Get cached LLM instance. Creates a new instance per distinct provider/arguments.
     
     Args:
         provider: LLM provider
@@ -236,26 +272,26 @@ def get_llm_cached(provider: Optional[str] = None, **kwargs) -> Any:
     Returns:
         Cached or new LLM instance
     """
-    global _llm_instance, _llm_provider
-    
     current_provider = provider or settings.llm_provider
+    key = (current_provider, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
     
-    # Return cached instance if provider hasn't changed
-    if _llm_instance is not None and _llm_provider == current_provider:
+    # Return cached instance if this provider/config was already built
+    if key in _llm_instances:
         log.debug(f"Returning cached LLM instance for provider: {current_provider}")
-        return _llm_instance
+        return _llm_instances[key]
     
     # Create new instance
     log.info(f"Creating new LLM instance for provider: {current_provider}")
-    _llm_instance = get_llm(provider=provider, **kwargs)
-    _llm_provider = current_provider
+    install_llm_cache()
+    llm = get_llm(provider=provider, **kwargs)
+    _llm_instances[key] = llm
     
-    return _llm_instance
+    return llm
 
 
 def reset_llm_cache():
-    """Reset the cached LLM instance. Useful when changing configuration."""
-    global _llm_instance, _llm_provider
+    """Reset the cached LLM instances. Useful when changing configuration."""
+    global _llm_cache_installed
     log.info("Resetting LLM cache")
-    _llm_instance = None
-    _llm_provider = None
+    _llm_instances.clear()
+    _llm_cache_installed = False
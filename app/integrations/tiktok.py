@@ -1,12 +1,12 @@
 """TikTok API integration (Mock implementation for development)."""
 
-from typing import Optional
+from typing import Optional, Union
 import asyncio
 from app.config import settings
 from app.utils.logger import log
 from app.utils.ratelimiter import RedisRateLimiter
+from app.utils.signing import hmac_sha256_hexdigest
 import hmac
-import hashlib
 
 
 class TikTokClient:
@@ -88,14 +88,14 @@ class TikTokClient:
     
     def verify_webhook_signature(
         self,
-        payload: str,
+        payload: Union[str, bytes],
         signature: str
     ) -> bool:
         """
         Verify TikTok webhook signature.
         
         Args:
-            payload: Webhook payload
+            payload: Raw webhook request body
             signature: Signature from headers
             
         Returns:
@@ -105,7 +105,7 @@ class TikTokClient:
         try:
             if not self.webhook_secret or not signature:
                 return False
-            mac = hmac.new(self.webhook_secret.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+            mac = hmac_sha256_hexdigest(self.webhook_secret, payload)
             return hmac.compare_digest(mac, signature)
         except Exception:
             return False
@@ -29,6 +29,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down application...")
+    await oauth.close_http_client()
 
 
 # Create FastAPI application
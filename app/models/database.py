@@ -1,7 +1,7 @@
 """Database models using SQLAlchemy."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -95,6 +95,15 @@ class Conversation(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     closed_at = Column(DateTime, nullable=True)
 
+    # Analytics date-range scans: counts read from the index, escalations from a partial index
+    __table_args__ = (
+        Index("ix_conversations_created_at", "created_at", postgresql_include=["escalated"]),
+        Index(
+            "ix_conversations_escalated_created_at", "created_at",
+            postgresql_where=escalated == True, sqlite_where=escalated == True
+        ),
+    )
+
     # Relationships
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
@@ -117,6 +126,18 @@ class Message(Base):
     extra_data = Column(Text, nullable=True)  # JSON stored as text
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Analytics date-range scans; Postgres answers the aggregates from the index alone
+    __table_args__ = (
+        Index(
+            "ix_messages_created_at", "created_at",
+            postgresql_include=["sender_type", "response_time_ms", "sentiment_score"]
+        ),
+        Index(
+            "ix_messages_created_at_intent", "created_at", "intent",
+            postgresql_where=intent.isnot(None), sqlite_where=intent.isnot(None)
+        ),
+    )
+
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
 
@@ -144,6 +165,14 @@ class Analytics(Base):
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     extra_data = Column(Text, nullable=True)  # JSON stored as text
 
+    # Per-metric date-range scans (e.g. A/B test summaries grouped by dimension)
+    __table_args__ = (
+        Index(
+            "ix_analytics_metric_type_timestamp", "metric_type", "timestamp",
+            postgresql_include=["dimension", "metric_value"]
+        ),
+    )
+
 
 class Credentials(Base):
     """OAuth credentials per user/platform."""
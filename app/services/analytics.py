@@ -1,10 +1,13 @@
 """Analytics service for collecting and calculating metrics."""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import json
+import time
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
 from datetime import datetime, timedelta
 
+from app.config import settings
 from app.models.database import Message, Conversation, Analytics, MessageSender, MessageIntent
 from app.utils.logger import log
 
@@ -24,42 +27,29 @@ class AnalyticsService:
         """Calculate system metrics for a date range."""
         log.info(f"Calculating metrics from {start_date} to {end_date}")
         
-        # Average response time
-        avg_response_time = self.db.query(func.avg(Message.response_time_ms)).filter(
-            Message.sender_type == MessageSender.AGENT,
-            Message.created_at >= start_date,
-            Message.created_at <= end_date,
-            Message.response_time_ms.isnot(None)
-        ).scalar() or 0.0
-        
-        # Total messages
-        total_messages = self.db.query(func.count(Message.id)).filter(
+        # Message aggregates in one pass; AVG skips the NULLs the CASE yields
+        # for non-agent messages
+        avg_response_time, total_messages, avg_sentiment = self.db.query(
+            func.avg(case((Message.sender_type == MessageSender.AGENT, Message.response_time_ms))),
+            func.count(Message.id),
+            func.avg(Message.sentiment_score)
+        ).filter(
             Message.created_at >= start_date,
             Message.created_at <= end_date
-        ).scalar()
+        ).one()
+        avg_response_time = avg_response_time or 0.0
         
-        # Total conversations
-        total_conversations = self.db.query(func.count(Conversation.id)).filter(
-            Conversation.created_at >= start_date,
-            Conversation.created_at <= end_date
-        ).scalar()
-        
-        # Escalation rate
-        total_escalations = self.db.query(func.count(Conversation.id)).filter(
-            Conversation.escalated == True,
+        # Conversation and escalation counts in one pass
+        total_conversations, total_escalations = self.db.query(
+            func.count(Conversation.id),
+            func.count(case((Conversation.escalated == True, 1)))
+        ).filter(
             Conversation.created_at >= start_date,
             Conversation.created_at <= end_date
-        ).scalar()
+        ).one()
         
         escalation_rate = (total_escalations / total_conversations * 100) if total_conversations > 0 else 0.0
         
-        # Average sentiment
-        avg_sentiment = self.db.query(func.avg(Message.sentiment_score)).filter(
-            Message.sentiment_score.isnot(None),
-            Message.created_at >= start_date,
-            Message.created_at <= end_date
-        ).scalar()
-        
         return {
             "average_response_time_ms": round(avg_response_time, 2),
             "total_messages": total_messages,
@@ -108,3 +98,101 @@ class AnalyticsService:
             }
             for intent, count in results
         ]
+
+
+class AnalyticsCache:
+    """
+    TTL cache for analytics endpoint payloads.
+    
+    Aggregates change slowly relative to how often dashboards poll them, so
+    identical requests within the TTL are served without touching the
+    database. The "memory" backend is per process; "redis" is shared
+    across workers. Backend errors are logged and treated as misses.
+    """
+    
+    MAX_ENTRIES = 1024
+    
+    def __init__(self, backend: str, ttl_seconds: int):
+        """Initialize the cache for a backend ('memory' or 'redis')."""
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._redis = None
+        if backend == "redis":
+            import redis
+            self._redis = redis.Redis.from_url(settings.redis_url)
+    
+    @staticmethod
+    def make_key(name: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> str:
+        """Build a cache key; requests using the default window share one key."""
+        start = start_date.isoformat() if start_date else ""
+        end = end_date.isoformat() if end_date else ""
+        return f"analytics:{name}:{start}:{end}"
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached payload for a key, if present and fresh."""
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(key)
+            except Exception as e:
+                log.warning(f"Analytics cache read failed: {e}")
+                return None
+            return json.loads(raw) if raw is not None else None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return payload
+    
+    def set(self, key: str, payload: Any, ttl_seconds: Optional[int] = None) -> None:
+        """Store a JSON-serializable payload under a key."""
+        ttl = ttl_seconds or self.ttl_seconds
+        if self._redis is not None:
+            try:
+                self._redis.setex(key, ttl, json.dumps(payload))
+            except Exception as e:
+                log.warning(f"Analytics cache write failed: {e}")
+            return
+        now = time.monotonic()
+        if len(self._entries) >= self.MAX_ENTRIES:
+            # Drop expired entries, then the oldest if every entry is still fresh
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (now + ttl, payload)
+    
+    def clear(self) -> None:
+        """Drop all in-process entries."""
+        self._entries.clear()
+
+
+_analytics_cache: Optional[AnalyticsCache] = None
+_analytics_cache_built = False
+
+
+def get_analytics_cache() -> Optional[AnalyticsCache]:
+    """Return the shared analytics response cache, or None when disabled."""
+    global _analytics_cache, _analytics_cache_built
+    if _analytics_cache_built:
+        return _analytics_cache
+    _analytics_cache_built = True
+    
+    backend = (settings.analytics_cache or "none").lower().strip()
+    if backend == "none" or settings.analytics_cache_ttl_seconds <= 0:
+        return None
+    if backend not in ("memory", "redis"):
+        log.warning(f"Unknown ANALYTICS_CACHE backend: {backend}; analytics cache disabled")
+        return None
+    _analytics_cache = AnalyticsCache(backend, settings.analytics_cache_ttl_seconds)
+    log.info(f"Analytics response cache enabled (backend={backend})")
+    return _analytics_cache
+
+
+def reset_analytics_cache() -> None:
+    """Forget the shared cache so the next call rebuilds it from settings."""
+    global _analytics_cache, _analytics_cache_built
+    _analytics_cache = None
+    _analytics_cache_built = False
@@ -10,8 +10,7 @@ from app.models.database import (
     ConversationStatus, MessageSender, MessageIntent, MessageDirection
 )
 from app.agent.graph import get_agent
-from app.integrations.tiktok import TikTokClient
-from app.integrations.linkedin import LinkedInClient
+from app.integrations import get_platform_client
 from app.utils.logger import log
 from app.services.analytics import AnalyticsService
 from app.config import settings
@@ -147,7 +146,7 @@ async def process_incoming_message(
     except Exception:
         sticky_variant = None
 
-    agent_result = await agent.process_message(
+    agent_result = await agent.aprocess_message(
         message=message_content,
         conversation_history=history,
         sticky_prompt_variant=sticky_variant,
@@ -253,10 +252,10 @@ async def send_message_to_platform(
         except Exception:
             access_token = None
         if platform == Platform.TIKTOK:
-            client = TikTokClient()
+            client = get_platform_client(Platform.TIKTOK)
             return await client.send_message(conversation_id, message, media_url=media_url, access_token=access_token)
         elif platform == Platform.LINKEDIN:
-            client = LinkedInClient()
+            client = get_platform_client(Platform.LINKEDIN)
             return await client.send_message(conversation_id, message, access_token=access_token)
         else:
             log.error(f"Unknown platform: {platform}")
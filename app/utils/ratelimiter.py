@@ -1,8 +1,7 @@
-"""Redis-backed token bucket rate limiter."""
+"""Redis-backed GCRA rate limiter."""
 
-import time
 import math
-from typing import Optional
+import time
 
 import redis
 
@@ -10,54 +9,50 @@ from app.config import settings
 from app.utils.logger import log
 
 
+# Generic cell rate algorithm: the key holds the theoretical arrival time
+# (TAT) of the next request. Allows bursts of up to `period / emission`
+# requests, then one every `emission` seconds -- the same budget as a token
+# bucket of that capacity, in one atomic round-trip.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tat = tonumber(redis.call("GET", KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+local new_tat = tat + emission
+local allow_at = new_tat - period
+if now < allow_at then
+    return {0, tostring(allow_at - now)}
+end
+redis.call("SET", KEYS[1], tostring(new_tat), "PX", math.ceil((new_tat - now) * 1000))
+return {1, "0"}
+"""
+
+
 class RedisRateLimiter:
-    """Token-bucket limiter using Redis for distributed enforcement."""
+    """GCRA limiter using a Redis Lua script for atomic distributed enforcement."""
 
     def __init__(self, key_prefix: str, rate_limit: int, time_window: int = 60):
         self.key_prefix = key_prefix
         self.rate_limit = rate_limit
         self.time_window = time_window
         self.redis = redis.Redis.from_url(settings.redis_url)
+        # Sent with EVALSHA, falling back to EVAL once if Redis lacks the script
+        self._script = self.redis.register_script(GCRA_SCRIPT)
 
-    def _keys(self, scope: str):
-        base = f"rate:{self.key_prefix}:{scope}"
-        return base + ":tokens", base + ":updated"
+    def _key(self, scope: str) -> str:
+        return f"rate:{self.key_prefix}:{scope}:tat"
 
     def acquire(self, scope: str) -> bool:
-        """Attempt to acquire a token. Returns True if allowed, else False."""
-        tokens_key, updated_key = self._keys(scope)
-        pipe = self.redis.pipeline()
-        now = time.time()
-
-        # Fetch current state
-        pipe.get(tokens_key)
-        pipe.get(updated_key)
-        current_tokens, last_update = pipe.execute()
-
-        try:
-            current_tokens = float(current_tokens) if current_tokens is not None else float(self.rate_limit)
-        except Exception:
-            current_tokens = float(self.rate_limit)
-        try:
-            last_update = float(last_update) if last_update is not None else now
-        except Exception:
-            last_update = now
-
-        # Refill based on elapsed time
-        elapsed = max(0.0, now - last_update)
-        refill_rate = self.rate_limit / self.time_window
-        new_tokens = min(self.rate_limit, current_tokens + elapsed * refill_rate)
-
-        allowed = new_tokens >= 1.0
-        if allowed:
-            new_tokens -= 1.0
-        else:
-            log.warning(f"Rate limit hit for {scope}; tokens={new_tokens:.2f}")
-
-        # Persist state
-        pipe = self.redis.pipeline()
-        pipe.set(tokens_key, new_tokens)
-        pipe.set(updated_key, now)
-        pipe.execute()
-
-        return allowed
+        """Attempt to acquire a slot. Returns True if allowed, else False."""
+        emission = self.time_window / self.rate_limit
+        allowed, retry_after = self._script(
+            keys=[self._key(scope)],
+            args=[emission, self.time_window, time.time()],
+        )
+        if not int(allowed):
+            log.warning(f"Rate limit hit for {scope}; retry in {math.ceil(float(retry_after))}s")
+            return False
+        return True
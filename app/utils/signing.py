@@ -0,0 +1,30 @@
+"""HMAC helpers for webhook signature verification."""
+
+import hashlib
+import hmac
+from functools import lru_cache
+from typing import Union
+
+
+@lru_cache(maxsize=16)
+def _hmac_template(secret: str) -> "hmac.HMAC":
+    """Return a keyed HMAC-SHA256 object for ``secret`` with no data fed yet.
+
+    Keying pads the secret into the inner/outer digest states; caching the
+    keyed object lets each request start from ``copy()`` instead. Keyed by
+    secret so rotated credentials get their own template.
+    """
+    return hmac.new(secret.encode("utf-8"), b"", hashlib.sha256)
+
+
+def hmac_sha256_hexdigest(secret: str, payload: Union[str, bytes]) -> str:
+    """Compute the hex HMAC-SHA256 of ``payload`` keyed with ``secret``.
+
+    Pass the raw request body as bytes where possible: senders sign the
+    bytes they sent, which a re-serialized model need not reproduce.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    mac = _hmac_template(secret).copy()
+    mac.update(payload)
+    return mac.hexdigest()
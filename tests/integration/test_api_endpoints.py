@@ -3,6 +3,11 @@
 from fastapi.testclient import TestClient
 import json
 
+from app.integrations.tiktok import TikTokClient
+
+# Captured at import time, before the autouse fixture mocks it out
+_real_tiktok_verify = TikTokClient.verify_webhook_signature
+
 
 # ============================================
 # Basic Health Endpoints
@@ -167,6 +172,27 @@ def test_tiktok_webhook_missing_signature(client: TestClient, monkeypatch):
     assert response.status_code == 401
 
 
+def test_tiktok_webhook_signature_covers_raw_body(client: TestClient, monkeypatch, mock_celery_tasks):
+    """Test the signature is checked against the exact bytes the sender signed."""
+    from app.integrations import get_platform_client
+    from app.utils.signing import hmac_sha256_hexdigest
+
+    monkeypatch.setattr(TikTokClient, "verify_webhook_signature", _real_tiktok_verify)
+    monkeypatch.setattr(get_platform_client("tiktok"), "webhook_secret", "shh")
+
+    # Key order and spacing differ from what model_dump_json() would produce
+    body = '{"timestamp": 1234567890, "conversation_id": "conv_raw", "message": "Hi", "user_id": "user_raw", "event_type": "message"}'
+    headers = {"content-type": "application/json", "x-signature": hmac_sha256_hexdigest("shh", body)}
+
+    response = client.post("/webhooks/tiktok", content=body, headers=headers)
+    assert response.status_code == 200
+    assert mock_celery_tasks.delay.called
+
+    headers["x-signature"] = hmac_sha256_hexdigest("other", body)
+    response = client.post("/webhooks/tiktok", content=body, headers=headers)
+    assert response.status_code == 401
+
+
 # ============================================
 # Message Sending - Async Tests
 # ============================================
@@ -290,6 +316,56 @@ def test_conversations_filter_by_assigned_to(client: TestClient, sample_conversa
     assert any(conv["id"] == sample_conversation.id for conv in data)
 
 
+def test_list_conversations_loads_messages_in_one_query(client: TestClient, db, sample_user):
+    """Test listing conversations does not issue a query per conversation."""
+    from sqlalchemy import event
+    from app.models.database import Conversation, Message, MessageSender, Platform
+
+    for i in range(5):
+        conv = Conversation(
+            user_id=sample_user.id,
+            platform=Platform.TIKTOK,
+            platform_conversation_id=f"n_plus_one_{i}"
+        )
+        db.add(conv)
+        db.flush()
+        db.add(Message(conversation_id=conv.id, sender_type=MessageSender.USER, content=f"msg {i}"))
+    db.commit()
+    db.expire_all()
+
+    statements = []
+    engine = db.get_bind()
+
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_selects)
+    try:
+        response = client.get("/conversations")
+    finally:
+        event.remove(engine, "before_cursor_execute", count_selects)
+
+    assert response.status_code == 200
+    assert all(len(conv["messages"]) == 1 for conv in response.json())
+    # One query for conversations, one IN query for their messages
+    assert len(statements) == 2
+    # Columns the response does not serialize are not fetched
+    assert "assigned_to" not in statements[0]
+    assert "extra_data" not in statements[1]
+
+
+def test_conversations_filter_by_platform_and_status(client: TestClient, sample_conversation):
+    """Test enum filters match valid values and reject unknown ones."""
+    response = client.get("/conversations?platform=tiktok&status=active")
+    assert response.status_code == 200
+    assert [conv["id"] for conv in response.json()] == [sample_conversation.id]
+
+    assert client.get("/conversations?platform=linkedin").json() == []
+    assert client.get("/conversations?platform=myspace").status_code == 422
+    assert client.get("/conversations?status=archived").status_code == 422
+
+
 def test_old_conversation_path_not_found(client: TestClient):
     """Test old path /messages/conversations returns 404."""
     response = client.get("/messages/conversations")
@@ -310,6 +386,86 @@ def test_get_metrics(client: TestClient):
     assert "escalation_rate" in data
 
 
+def test_get_metrics_aggregates(client: TestClient, db, sample_user):
+    """Test metrics and escalation stats aggregate seeded data correctly."""
+    from app.models.database import Conversation, Message, MessageSender, Platform
+
+    convs = []
+    for i, escalated in enumerate([False, False, False, True]):
+        conv = Conversation(
+            user_id=sample_user.id,
+            platform=Platform.TIKTOK,
+            platform_conversation_id=f"metrics_conv_{i}",
+            escalated=escalated,
+            escalation_reason="angry customer" if escalated else None
+        )
+        db.add(conv)
+        convs.append(conv)
+    db.commit()
+    db.add_all([
+        Message(conversation_id=convs[0].id, sender_type=MessageSender.USER,
+                content="hi", sentiment_score=0.5, response_time_ms=9999),
+        Message(conversation_id=convs[0].id, sender_type=MessageSender.AGENT,
+                content="hello", response_time_ms=100),
+        Message(conversation_id=convs[1].id, sender_type=MessageSender.AGENT,
+                content="hello", response_time_ms=300, sentiment_score=-0.1),
+        Message(conversation_id=convs[1].id, sender_type=MessageSender.AGENT,
+                content="pending"),
+    ])
+    db.commit()
+
+    data = client.get("/analytics/metrics").json()
+    assert data["total_messages"] == 4
+    assert data["total_conversations"] == 4
+    assert data["average_response_time_ms"] == 200.0
+    assert data["escalation_rate"] == 25.0
+    assert data["average_sentiment"] == 0.2
+
+    stats = client.get("/analytics/escalations").json()
+    assert stats["total_escalations"] == 1
+    assert stats["escalation_rate"] == 25.0
+    assert stats["top_reasons"] == [{"reason": "angry customer", "count": 1}]
+
+
+def test_analytics_response_cache(client: TestClient, db, sample_user, monkeypatch):
+    """Test analytics responses are cached per date range when enabled."""
+    from app.config import settings
+    from app.models.database import Conversation, Platform
+    from app.services.analytics import reset_analytics_cache
+
+    monkeypatch.setattr(settings, "analytics_cache", "memory")
+    reset_analytics_cache()
+    try:
+        first = client.get("/analytics/metrics").json()
+        db.add(Conversation(
+            user_id=sample_user.id,
+            platform=Platform.TIKTOK,
+            platform_conversation_id="cache_conv"
+        ))
+        db.commit()
+
+        # Same default window: served from the cache
+        assert client.get("/analytics/metrics").json() == first
+        # A different window is computed fresh
+        fresh = client.get("/analytics/metrics?start_date=2000-01-01T00:00:00").json()
+        assert fresh["total_conversations"] == first["total_conversations"] + 1
+    finally:
+        reset_analytics_cache()
+
+
+def test_get_ab_test_stats(client: TestClient, db):
+    """Test A/B stats count valid outcomes per variant."""
+    from app.models.database import Analytics
+
+    for variant, value in [("A", 1.0), ("A", 0.0), ("A", 1.0), ("B", 0.0)]:
+        db.add(Analytics(metric_type="ab_test", metric_value=value, dimension=variant))
+    db.commit()
+
+    variants = {v["variant"]: v for v in client.get("/analytics/ab_tests").json()["variants"]}
+    assert variants["A"] == {"variant": "A", "total": 3, "valid": 2, "valid_rate": 66.67}
+    assert variants["B"] == {"variant": "B", "total": 1, "valid": 0, "valid_rate": 0.0}
+
+
 def test_get_conversation_insights(client: TestClient):
     """Test conversation insights endpoint."""
     response = client.get("/analytics/conversations")
@@ -379,6 +535,21 @@ def test_get_logs(client: TestClient):
     assert "logs" in data
 
 
+def test_tail_lines_reads_only_the_end(tmp_path):
+    """Test the log tail matches readlines()[-n:] across chunk boundaries."""
+    from app.api.routes.admin import _tail_lines
+
+    log_file = tmp_path / "app.log"
+    lines = [f"2024-01-01 00:00:00 | INFO     | line {i} é\n" for i in range(500)]
+    log_file.write_text("".join(lines) + "partial", encoding="utf-8")
+    expected = (lines + ["partial"])[-37:]
+
+    assert _tail_lines(log_file, 37, chunk_size=64) == expected
+    assert _tail_lines(log_file, 37) == expected
+    assert _tail_lines(log_file, 1000) == lines + ["partial"]
+    assert _tail_lines(log_file, 0) == []
+
+
 # ============================================
 # Agent Management Endpoints
 # ============================================
@@ -392,6 +563,31 @@ def test_agent_status(client: TestClient):
     assert "total_conversations" in data
 
 
+def test_agent_status_counts(client: TestClient, db, sample_user):
+    """Test agent status conversation counts."""
+    from app.models.database import Conversation, ConversationStatus, Platform
+
+    for i, (conv_status, escalated) in enumerate([
+        (ConversationStatus.ACTIVE, False),
+        (ConversationStatus.ACTIVE, False),
+        (ConversationStatus.ESCALATED, True),
+        (ConversationStatus.CLOSED, False),
+    ]):
+        db.add(Conversation(
+            user_id=sample_user.id,
+            platform=Platform.TIKTOK,
+            platform_conversation_id=f"status_conv_{i}",
+            status=conv_status,
+            escalated=escalated
+        ))
+    db.commit()
+
+    data = client.get("/admin/agent/status").json()
+    assert data["total_conversations"] == 4
+    assert data["active_conversations"] == 2
+    assert data["escalated_conversations"] == 1
+
+
 def test_configure_agent(client: TestClient):
     """Test agent configuration endpoint."""
     response = client.post(
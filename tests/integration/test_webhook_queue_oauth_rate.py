@@ -63,6 +63,67 @@ async def test_oauth_callback_stores_credentials_and_used_in_send(db: Session):
         assert send_mock.called
 
 
+@pytest.mark.asyncio
+async def test_oauth_token_exchange_uses_shared_async_client(db: Session, monkeypatch):
+    """Ensure the LinkedIn token exchange goes through the shared httpx client."""
+    import httpx
+    from app.api.routes import oauth
+    from app.config import settings
+
+    requests_seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        return httpx.Response(200, json={"access_token": "real-token", "expires_in": 60})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(oauth, "get_http_client", lambda: client)
+    monkeypatch.setattr(settings, "linkedin_client_id", "cid")
+    monkeypatch.setattr(settings, "linkedin_client_secret", "secret")
+    try:
+        resp = await linkedin_oauth_callback(
+            code="abc", redirect_uri="http://localhost/cb", platform_user_id="lin-httpx", db=db
+        )
+    finally:
+        await client.aclose()
+
+    assert resp["access_token"] == "real-token"
+    assert str(requests_seen[0].url) == oauth.LINKEDIN_TOKEN_URL
+    assert b"code=abc" in requests_seen[0].content
+
+    # The new user and its credentials are committed together
+    user = db.query(User).filter(User.platform_user_id == "lin-httpx").one()
+    cred = db.query(Credentials).filter(Credentials.user_id == user.id).one()
+    assert cred.access_token == "real-token"
+
+
+@pytest.mark.asyncio
+async def test_oauth_reconnect_reuses_existing_user(db: Session, monkeypatch):
+    """Ensure a repeat OAuth callback stores new credentials for the same user."""
+    import httpx
+    from app.api.routes.oauth import tiktok_oauth_callback
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "tiktok_client_key", "key")
+    monkeypatch.setattr(settings, "tiktok_client_secret", "secret")
+    # Token exchange is rejected, so the callback falls back to mock tokens
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(400)))
+    monkeypatch.setattr("app.api.routes.oauth.get_http_client", lambda: client)
+
+    try:
+        for _ in range(2):
+            resp = await tiktok_oauth_callback(
+                code="abc", redirect_uri="http://localhost/cb", platform_user_id="tt-repeat", db=db
+            )
+            assert resp["status"] == "success"
+    finally:
+        await client.aclose()
+
+    user = db.query(User).filter(User.platform_user_id == "tt-repeat").one()
+    assert user.platform == Platform.TIKTOK
+    assert db.query(Credentials).filter(Credentials.user_id == user.id).count() == 2
+
+
 @pytest.mark.asyncio
 async def test_redis_rate_limiter_blocks_when_exhausted():
     """Verify rate limiter gate in TikTok client blocks when tokens exhausted."""
@@ -73,3 +134,41 @@ async def test_redis_rate_limiter_blocks_when_exhausted():
         ok2 = await client.send_message("convX", "second")
         assert ok1 is True
         assert ok2 is False
+
+
+def test_hmac_sha256_hexdigest_matches_fresh_hmac():
+    """Cached keyed HMAC templates give the same digests as keying per call."""
+    import hashlib
+    import hmac
+
+    from app.utils.signing import hmac_sha256_hexdigest
+
+    for secret in ("secret-a", "secret-b"):
+        for payload in ('{"event_type": "message"}', "", "ünïcode"):
+            expected = hmac.new(secret.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+            assert hmac_sha256_hexdigest(secret, payload) == expected
+
+
+def test_redis_rate_limiter_runs_gcra_script():
+    """Each acquire is one script call keyed per scope; a zero result blocks."""
+    from app.utils.ratelimiter import RedisRateLimiter
+
+    limiter = RedisRateLimiter(key_prefix="tiktok", rate_limit=30, time_window=60)
+    limiter._script = MagicMock(side_effect=[[1, b"0"], [0, b"1.5"]])
+
+    assert limiter.acquire("convY") is True
+    assert limiter.acquire("convY") is False
+
+    call = limiter._script.call_args_list[0]
+    assert call.kwargs["keys"] == ["rate:tiktok:convY:tat"]
+    assert call.kwargs["args"][:2] == [2.0, 60]
+
+
+@requires_redis
+def test_redis_rate_limiter_allows_burst_then_blocks():
+    """The GCRA script admits rate_limit requests at once, then blocks."""
+    import uuid
+    from app.utils.ratelimiter import RedisRateLimiter
+
+    limiter = RedisRateLimiter(key_prefix=f"test-{uuid.uuid4().hex}", rate_limit=3, time_window=60)
+    assert [limiter.acquire("s") for _ in range(4)] == [True, True, True, False]
@@ -1,6 +1,9 @@
 """Unit tests for agent nodes."""
 
+import asyncio
+
 import pytest
+from langchain_core.messages import AIMessage
 from app.agent.nodes import AgentNodes
 
 
@@ -20,6 +23,8 @@ async def test_classify_message_support(agent_nodes):
     
     result = await agent_nodes.classify_message(state)
     assert result["intent"] in ["support", "urgent"]
+    assert result["message_lower"] == "i have an issue with my order #12345"
+    assert result["formatted_context"] == "No previous context."
 
 
 @pytest.mark.asyncio
@@ -65,14 +70,15 @@ async def test_generate_response(agent_nodes):
     assert len(result["response"]) > 0
 
 
-def test_check_escalation(agent_nodes):
+@pytest.mark.asyncio
+async def test_check_escalation(agent_nodes):
     """Test escalation checking."""
     # Urgent intent
     state_urgent = {
         "message": "This is terrible!",
         "intent": "urgent"
     }
-    result = agent_nodes.check_escalation(state_urgent)
+    result = await agent_nodes.check_escalation(state_urgent)
     assert result["requires_escalation"] == True
     
     # Normal intent
@@ -80,24 +86,424 @@ def test_check_escalation(agent_nodes):
         "message": "I have a question",
         "intent": "general"
     }
-    result = agent_nodes.check_escalation(state_normal)
+    result = await agent_nodes.check_escalation(state_normal)
     assert result.get("requires_escalation", False) == False
 
 
-def test_validate_response(agent_nodes):
+@pytest.mark.asyncio
+async def test_validate_response(agent_nodes):
     """Test response validation."""
     # Valid response
     state_valid = {
         "response": "This is a valid response to your question."
     }
-    result = agent_nodes.validate_response(state_valid)
+    result = await agent_nodes.validate_response(state_valid)
     assert result["response_valid"] == True
     
     # Invalid (too short) response
     state_invalid = {
         "response": "Hi"
     }
-    result = agent_nodes.validate_response(state_invalid)
+    result = await agent_nodes.validate_response(state_invalid)
     assert result["response_valid"] == False
     assert result["requires_escalation"] == True
 
+
+@pytest.mark.asyncio
+async def test_generate_response_validates_inline(agent_nodes):
+    """Test generate_response sets response_valid without a separate node."""
+    agent_nodes.llm = None
+    state = {
+        "message": "What plans do you offer?",
+        "intent": "sales",
+        "formatted_context": "No previous context.",
+        "sentiment_score": 0.0,
+    }
+
+    result = await agent_nodes.generate_response(state)
+    assert result["response"]
+    assert result["response_valid"] is True
+
+
+
+@pytest.mark.asyncio
+async def test_run_tools_collects_results(agent_nodes):
+    """Test planned tools all run and dependent lookups are chained."""
+    state = {
+        "planned_tool_calls": [
+            {"name": "extract_order_number", "args": {"text": "Where is order AB123456?"}},
+            {"name": "unknown_tool", "args": {}},
+        ]
+    }
+
+    result = await agent_nodes.run_tools(state)
+    tool_results = result["tool_results"]
+    assert tool_results["extract_order_number"] == "AB123456"
+    assert tool_results["lookup_order_status"]["found"] is True
+    assert "error" in tool_results["unknown_tool"]
+
+
+@pytest.mark.asyncio
+async def test_run_tools_order_lookup_overlaps_profile_fetch(agent_nodes, monkeypatch):
+    """Test the chained order lookup runs before the profile fetch is awaited."""
+    import app.agent.nodes as nodes_module
+
+    lookup_started = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def fake_lookup(order_number):
+        loop.call_soon_threadsafe(lookup_started.set)
+        return {"found": True, "order_number": order_number}
+
+    async def slow_profile(platform, user_id):
+        # Only completes once the lookup has started concurrently
+        await asyncio.wait_for(lookup_started.wait(), timeout=2)
+        return {"ok": True}
+
+    monkeypatch.setattr(nodes_module, "lookup_order_status", fake_lookup)
+    monkeypatch.setattr(nodes_module, "fetch_profile", slow_profile)
+    state = {
+        "planned_tool_calls": [
+            {"name": "fetch_profile", "args": {"platform": "tiktok", "user_id": "u1"}},
+            {"name": "extract_order_number", "args": {"text": "Where is order AB123456?"}},
+        ]
+    }
+
+    result = await agent_nodes.run_tools(state)
+    assert result["tool_results"]["fetch_profile"] == {"ok": True}
+    assert result["tool_results"]["lookup_order_status"]["order_number"] == "AB123456"
+
+
+@pytest.mark.asyncio
+async def test_run_tools_propagates_cancellation(agent_nodes, monkeypatch):
+    """Test a cancelled tool call cancels the node instead of being recorded."""
+    import app.agent.nodes as nodes_module
+
+    async def cancelled(platform, user_id):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr(nodes_module, "fetch_profile", cancelled)
+    state = {"planned_tool_calls": [{"name": "fetch_profile", "args": {"platform": "tiktok", "user_id": "u1"}}]}
+
+    with pytest.raises(asyncio.CancelledError):
+        await agent_nodes.run_tools(state)
+
+
+class StubLLM:
+    """Minimal async LLM returning a fixed classification."""
+
+    def __init__(self, content="CLASSIFICATION: SALES\nREASON: pricing question"):
+        self.content = content
+        self.calls = 0
+
+    def bind_tools(self, tools):
+        return self
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=self.content)
+
+
+class StubSemanticCache:
+    """Semantic cache stub recording lookups and inserts."""
+
+    def __init__(self, hit=None, fail=False, exact=None):
+        self.hit = hit
+        self.fail = fail
+        self.exact = exact
+        self.embedded = 0
+        self.added = []
+
+    def get_exact(self, key):
+        return self.exact
+
+    async def embed(self, text):
+        self.embedded += 1
+        if self.fail:
+            raise RuntimeError("embedding service down")
+        return [1.0]
+
+    def search(self, vec):
+        return self.hit
+
+    def add(self, vec, intent, reason, key=None):
+        self.added.append((intent, reason, key))
+
+
+PRICING_STATE = {
+    "message": "What does the enterprise plan cost?",
+    "conversation_history": []
+}
+
+
+@pytest.mark.asyncio
+async def test_classify_message_semantic_cache_hit_skips_llm(agent_nodes):
+    """Test a semantic cache hit returns without calling the LLM."""
+    agent_nodes.llm = StubLLM()
+    agent_nodes.semantic_cache = StubSemanticCache(hit=("sales", "cached reason"))
+
+    result = await agent_nodes.classify_message(dict(PRICING_STATE))
+    assert result["intent"] == "sales"
+    assert result["classification_reason"] == "cached reason"
+    assert agent_nodes.llm.calls == 0
+
+
+
+@pytest.mark.asyncio
+async def test_classify_message_exact_cache_hit_skips_embedding(agent_nodes):
+    """Test a verbatim repeat is served without embedding or calling the LLM."""
+    agent_nodes.llm = StubLLM()
+    agent_nodes.semantic_cache = StubSemanticCache(exact=("sales", "cached reason"))
+
+    result = await agent_nodes.classify_message(dict(PRICING_STATE))
+    assert result["intent"] == "sales"
+    assert agent_nodes.semantic_cache.embedded == 0
+    assert agent_nodes.llm.calls == 0
+
+@pytest.mark.asyncio
+async def test_classify_message_semantic_cache_miss_adds_entry(agent_nodes):
+    """Test a cache miss calls the LLM and stores its classification."""
+    agent_nodes.llm = StubLLM()
+    agent_nodes.semantic_cache = StubSemanticCache()
+
+    result = await agent_nodes.classify_message(dict(PRICING_STATE))
+    assert result["intent"] == "sales"
+    assert agent_nodes.llm.calls == 1
+    assert agent_nodes.semantic_cache.added == [
+        ("sales", result["classification_reason"], "what does the enterprise plan cost?")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_classify_message_semantic_cache_failure_falls_back_to_llm(agent_nodes):
+    """Test a failed embedding falls back to the LLM without caching."""
+    agent_nodes.llm = StubLLM()
+    agent_nodes.semantic_cache = StubSemanticCache(fail=True)
+
+    result = await agent_nodes.classify_message(dict(PRICING_STATE))
+    assert result["intent"] == "sales"
+    assert agent_nodes.llm.calls == 1
+    assert agent_nodes.semantic_cache.added == []
+
+
+@pytest.mark.asyncio
+async def test_classify_message_semantic_cache_skipped_with_history(agent_nodes):
+    """Test the message-keyed cache is bypassed when history affects the prompt."""
+    agent_nodes.llm = StubLLM()
+    agent_nodes.semantic_cache = StubSemanticCache(hit=("support", "cached reason"))
+    state = dict(PRICING_STATE, conversation_history=[{"sender_type": "user", "content": "Hi"}])
+
+    result = await agent_nodes.classify_message(state)
+    assert result["intent"] == "sales"
+    assert agent_nodes.llm.calls == 1
+    assert agent_nodes.semantic_cache.added == []
+
+
+@pytest.mark.asyncio
+async def test_gather_context_sets_context_and_escalation(agent_nodes):
+    """Test gather_context fills both context and escalation fields."""
+    state = {
+        "message": "My account was hacked, this is urgent!",
+        "intent": "urgent",
+        "conversation_history": [{"sender_type": "user", "content": "Hello"}]
+    }
+
+    result = await agent_nodes.gather_context(state)
+    assert result["formatted_context"] == "USER: Hello"
+    assert "sentiment_score" in result
+    assert result["requires_escalation"] is True
+
+
+def test_chat_prompt_parsed_once(agent_nodes):
+    """Test response prompt templates are parsed once and reused."""
+    first = agent_nodes._get_chat_prompt("Answer {message} given {context}")
+    second = agent_nodes._get_chat_prompt("Answer {message} given {context}")
+    assert first is second
+
+
+def test_llm_initialized_lazily(monkeypatch):
+    """Test the LLM client is only resolved on first access."""
+    import app.agent.nodes as nodes_module
+
+    calls = []
+    monkeypatch.setattr(nodes_module, "get_llm_cached", lambda: calls.append(1) or None)
+
+    nodes = AgentNodes()
+    assert calls == []
+    assert nodes.llm is None
+    assert nodes.llm is None
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_gather_context_plans_tools_when_not_escalated(agent_nodes):
+    """Test gather_context plans tools only for non-escalated messages."""
+    state = {
+        "message": "Where is my order AB123456?",
+        "intent": "support",
+        "conversation_history": []
+    }
+
+    result = await agent_nodes.gather_context(state)
+    assert result["requires_escalation"] is False
+    assert [c["name"] for c in result["planned_tool_calls"]] == ["extract_order_number"]
+
+
+@pytest.mark.asyncio
+async def test_plan_tools_skips_general_without_hints(agent_nodes):
+    """Test general messages without order hints plan no tools."""
+    state = {
+        "message": "Hi there, nice to meet you",
+        "intent": "general",
+        "platform": "tiktok",
+        "platform_user_id": "u1",
+    }
+
+    result = await agent_nodes.plan_tools(state)
+    assert result["planned_tool_calls"] == []
+
+    state["intent"] = "sales"
+    result = await agent_nodes.plan_tools(state)
+    assert [c["name"] for c in result["planned_tool_calls"]] == ["fetch_profile"]
+
+
+@pytest.mark.asyncio
+async def test_classify_message_unparseable_llm_output_falls_back(agent_nodes):
+    """Test LLM output without a CLASSIFICATION line uses rule-based intent."""
+    agent_nodes.llm = StubLLM(content="I think this is about pricing.")
+    agent_nodes.semantic_cache = None
+
+    result = await agent_nodes.classify_message(dict(PRICING_STATE))
+    assert agent_nodes.llm.calls == 1
+    assert result["intent"] == "sales"
+
+
+class ToolCallingLLM(StubLLM):
+    """Stub LLM that requests tools first, then answers."""
+
+    def __init__(self):
+        super().__init__(content="done")
+        self.final_messages = None
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.calls == 1:
+            return AIMessage(content="", tool_calls=[
+                {"name": "detect_language", "args": {"text": "hola, gracias"}, "id": "call_1"},
+                {"name": "unknown_tool", "args": {}, "id": "call_2"},
+            ])
+        self.final_messages = messages
+        return AIMessage(content=self.content)
+
+
+@pytest.mark.asyncio
+async def test_invoke_with_tools_runs_tool_calls_in_order(agent_nodes):
+    """Test requested tools run and their messages keep the model's order."""
+    agent_nodes.llm = ToolCallingLLM()
+
+    text = await agent_nodes._invoke_with_tools([])
+    assert text == "done"
+    tool_msgs = agent_nodes.llm.final_messages[-2:]
+    assert [m.tool_call_id for m in tool_msgs] == ["call_1", "call_2"]
+    assert tool_msgs[0].content == "es"
+    assert tool_msgs[1].content.startswith("ERROR:")
+
+
+@pytest.mark.asyncio
+async def test_classify_message_parses_mixed_case_label(agent_nodes):
+    """Test the classification label is parsed regardless of case."""
+    agent_nodes.llm = StubLLM(content="Classification: Support\nReason: order question")
+    agent_nodes.semantic_cache = None
+
+    result = await agent_nodes.classify_message(dict(PRICING_STATE))
+    assert result["intent"] == "support"
+
+
+@pytest.mark.asyncio
+async def test_classify_message_uses_classifier_llm(agent_nodes):
+    """Test classification goes to the dedicated classifier LLM when set."""
+    agent_nodes.llm = StubLLM()
+    agent_nodes.classifier_llm = StubLLM(content="CLASSIFICATION: SUPPORT\nREASON: order question")
+    agent_nodes.semantic_cache = None
+
+    result = await agent_nodes.classify_message(dict(PRICING_STATE))
+    assert result["intent"] == "support"
+    assert agent_nodes.classifier_llm.calls == 1
+    assert agent_nodes.llm.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_resolve_with_tools_without_results_uses_plain_generation(agent_nodes):
+    """Test empty tool results skip the tool-augmented LLM prompt."""
+    agent_nodes.llm = StubLLM(content="Happy to help with our plans and pricing!")
+    state = {
+        "message": "What plans do you offer?",
+        "intent": "sales",
+        "formatted_context": "No previous context.",
+        "tool_results": {},
+    }
+    calls = []
+
+    async def fake_generate(s):
+        calls.append(s)
+        return s
+
+    agent_nodes.generate_response = fake_generate
+    await agent_nodes.resolve_with_tools(state)
+    assert calls == [state]
+    assert agent_nodes.llm.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_classify_message_prefetches_profile(agent_nodes, monkeypatch):
+    """Test the profile fetch starts alongside LLM classification."""
+    import app.agent.nodes as nodes_module
+
+    fetched = []
+
+    async def fake_fetch_profile(platform, user_id):
+        fetched.append((platform, user_id))
+        return {"ok": True}
+
+    monkeypatch.setattr(nodes_module, "fetch_profile", fake_fetch_profile)
+    agent_nodes.llm = StubLLM()
+    agent_nodes.semantic_cache = None
+    state = dict(PRICING_STATE, platform="tiktok", platform_user_id="u1")
+
+    await agent_nodes.classify_message(state)
+    await asyncio.gather(*agent_nodes._background_tasks)
+    assert fetched == [("tiktok", "u1")]
+
+
+
+@pytest.mark.asyncio
+async def test_classify_message_cancels_unneeded_profile_prefetch(agent_nodes, monkeypatch):
+    """Test the prefetch is cancelled when the intent plans no tools."""
+    import app.agent.nodes as nodes_module
+
+    fetched = []
+
+    async def fake_fetch_profile(platform, user_id):
+        fetched.append((platform, user_id))
+        return {"ok": True}
+
+    monkeypatch.setattr(nodes_module, "fetch_profile", fake_fetch_profile)
+    agent_nodes.llm = StubLLM("CLASSIFICATION: GENERAL\nREASON: greeting")
+    agent_nodes.semantic_cache = None
+    state = {"message": "Hi there", "conversation_history": [], "platform": "tiktok", "platform_user_id": "u1"}
+
+    await agent_nodes.classify_message(state)
+    await asyncio.gather(*agent_nodes._background_tasks, return_exceptions=True)
+    assert state["intent"] == "general"
+    assert fetched == []
+
+
+def test_default_variant_reads_settings_at_call_time(monkeypatch):
+    """Test the fallback prompt variant follows the current settings value."""
+    from app.agent.nodes import _default_variant
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "agent_prompt_variant", "b")
+    assert _default_variant() == "B"
+    monkeypatch.setattr(settings, "agent_prompt_variant", "auto")
+    assert _default_variant() == "A"
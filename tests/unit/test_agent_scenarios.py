@@ -41,8 +41,29 @@ async def test_urgent_escalation_flow():
 
     assert result["intent"] == "urgent"
     assert result["requires_escalation"] is True
+    assert result["escalation_reason"] == "Urgent issue requiring immediate human attention"
     text = result["response"].lower()
     # Escalation message should apologize and indicate human handoff/high priority
     assert "connecting you with a human" in text or "human agent" in text
     assert "priority" in text
 
+
+
+@pytest.mark.asyncio
+async def test_aprocess_message_runs_full_workflow():
+    agent = CustomerSupportAgent()
+    msg = "Hello there, how are you today?"
+    result = await agent.aprocess_message(message=msg, conversation_history=[])
+
+    assert result["intent"] == "general"
+    assert result["requires_escalation"] is False
+    assert result["metadata"]["response_valid"] is True
+    assert len(result["response"]) > 0
+
+
+def test_process_message_sync_wrapper():
+    agent = CustomerSupportAgent()
+    msg = "I'm interested in your enterprise plan. What's the pricing for 50 users?"
+    result = agent.process_message_sync(message=msg, conversation_history=[])
+
+    assert result["intent"] == "sales"
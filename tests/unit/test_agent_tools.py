@@ -1,8 +1,17 @@
 """Unit tests for agent tools."""
 
+import asyncio
+
+import pytest
+
+import app.agent.tools as tools_module
 from app.agent.tools import (
+    assign_sticky_ab_variant,
+    classify_by_keywords,
+    detect_language,
     extract_sentiment_indicators,
     detect_urgency,
+    execute_tool_call,
     extract_order_number,
     format_context
 )
@@ -36,6 +45,29 @@ def test_detect_urgency():
     # Non-urgent message
     normal = "Hello, I have a question about pricing"
     assert detect_urgency(normal) == False
+    
+    # Shouting counts only for messages longer than 10 characters
+    assert detect_urgency("WHERE IS MY PACKAGE") == True
+    assert detect_urgency("HELLO THERE") == True
+    assert detect_urgency("OK THANKS") == False
+
+
+def test_detect_language():
+    """Test keyword language detection picks the language with most hints."""
+    assert detect_language("Hello, where is my package?") == "en"
+    assert detect_language("Hola, necesito ayuda") == "es"
+    assert detect_language("Danke für die Hilfe") == "de"
+    # French has more hints than the single Spanish word
+    assert detect_language("Bonjour, merci pour l'aide avec ma commande, gracias") == "fr"
+    # Ties keep the original priority order
+    assert detect_language("gracias, merci") == "es"
+
+
+def test_assign_sticky_ab_variant_is_stable():
+    """Test users keep the same A/B variant across calls and deploys."""
+    assert assign_sticky_ab_variant("user-1") == "B"
+    assert assign_sticky_ab_variant("user-4") == "A"
+    assert assign_sticky_ab_variant("user-4") == "A"
 
 
 def test_extract_order_number():
@@ -49,6 +81,23 @@ def test_extract_order_number():
     # Without order number
     text_2 = "I have a general question"
     assert extract_order_number(text_2) is None
+    
+    # Formats are tried in priority order, not by position in the text
+    assert extract_order_number("order 12345678, ref AB1234567") == "AB1234567"
+    assert extract_order_number("order: ABC-123") == "order: ABC-123"
+
+
+def test_execute_tool_call_without_validation_matches_tool():
+    """Test direct (unvalidated) tool calls return the same results."""
+    for name, args in [
+        ("extract_order_number", {"text": "order #AB123456"}),
+        ("extract_order_number", {"text": "no number here"}),
+        ("sentiment", {"text": "thanks, great help"}),
+        ("detect_language", {"text": "merci beaucoup"}),
+    ]:
+        assert execute_tool_call(name, args, validate=False) == execute_tool_call(name, args)
+    with pytest.raises(ValueError):
+        execute_tool_call("missing_tool", {}, validate=False)
 
 
 def test_format_context():
@@ -66,3 +115,45 @@ def test_format_context():
     
     # Empty messages
     assert format_context([]) == "No previous context."
+
+
+def test_classify_by_keywords_is_memoized():
+    """Test keyword classification results are served from the cache."""
+    classify_by_keywords.cache_clear()
+    assert classify_by_keywords("what is the price?") == "sales"
+    assert classify_by_keywords("what is the price?") == "sales"
+    assert classify_by_keywords("my order is late") == "support"
+    assert classify_by_keywords("hello there") == "general"
+    info = classify_by_keywords.cache_info()
+    assert info.hits == 1
+    assert info.misses == 3
+
+
+@pytest.mark.asyncio
+async def test_fetch_profile_caches_and_collapses_concurrent_calls(monkeypatch):
+    """Test concurrent and repeated profile fetches hit the platform once."""
+    calls = []
+
+    class FakeTikTokClient:
+        async def get_user_info(self, user_id):
+            calls.append(user_id)
+            await asyncio.sleep(0.01)
+            return {"user_id": user_id}
+
+    monkeypatch.setattr("app.integrations.tiktok.TikTokClient", FakeTikTokClient)
+    monkeypatch.setattr("app.integrations._clients", {})
+    tools_module._profile_cache.clear()
+
+    first, second = await asyncio.gather(
+        tools_module.fetch_profile("tiktok", "u1"),
+        tools_module.fetch_profile("tiktok", "u1"),
+    )
+    third = await tools_module.fetch_profile("TikTok", "u1")
+
+    assert calls == ["u1"]
+    assert first == second == third
+    assert first["profile"] == {"user_id": "u1"}
+    from app.integrations import get_platform_client
+    assert isinstance(get_platform_client("tiktok"), FakeTikTokClient)
+    tools_module._profile_cache.clear()
+
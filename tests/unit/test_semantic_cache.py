@@ -0,0 +1,71 @@
+"""Unit tests for the classification semantic cache."""
+
+import pytest
+from app.agent.semantic_cache import SemanticCache
+
+
+VECTORS = {
+    "what's the price": [1.0, 0.0, 0.0],
+    "whats the price?": [0.99, 0.05, 0.0],
+    "where is my order": [0.0, 1.0, 0.0],
+    "hello": [0.0, 0.0, 1.0],
+}
+
+
+async def fake_embed(text):
+    return VECTORS[text]
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_hit_on_near_duplicate():
+    cache = SemanticCache(embed_fn=fake_embed, threshold=0.92)
+    vec = await cache.embed("what's the price")
+    cache.add(vec, "sales", "CLASSIFICATION: SALES")
+
+    hit = cache.search(await cache.embed("whats the price?"))
+    assert hit == ("sales", "CLASSIFICATION: SALES")
+
+    assert cache.search(await cache.embed("where is my order")) is None
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_evicts_least_recently_used():
+    cache = SemanticCache(embed_fn=fake_embed, max_entries=2)
+    cache.add(await cache.embed("what's the price"), "sales", "")
+    cache.add(await cache.embed("where is my order"), "support", "")
+    # Touch the first entry so the second becomes least recently used
+    assert cache.search(await cache.embed("what's the price")) is not None
+    cache.add(await cache.embed("hello"), "general", "")
+
+    assert len(cache) == 2
+    assert cache.search(await cache.embed("where is my order")) is None
+    assert cache.search(await cache.embed("hello")) == ("general", "")
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_exact_key_survives_until_evicted():
+    cache = SemanticCache(embed_fn=fake_embed, max_entries=1)
+    cache.add(await cache.embed("hello"), "general", "", key="hello")
+    assert cache.get_exact("hello") == ("general", "")
+
+    cache.add(await cache.embed("where is my order"), "support", "", key="where is my order")
+    assert cache.get_exact("hello") is None
+    assert cache.get_exact("where is my order") == ("support", "")
+
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_overwrites_evicted_row_in_place():
+    cache = SemanticCache(embed_fn=fake_embed, max_entries=2)
+    cache.add(await cache.embed("what's the price"), "sales", "")
+    matrix = cache._matrix
+    assert matrix.shape == (2, 3)
+
+    cache.add(await cache.embed("where is my order"), "support", "")
+    cache.add(await cache.embed("hello"), "general", "")
+
+    # The evicted first entry's row now holds the new vector; no reallocation
+    assert cache._matrix is matrix
+    assert list(matrix[0]) == [0.0, 0.0, 1.0]
+    assert cache.search(await cache.embed("what's the price")) is None
+    assert cache.search(await cache.embed("where is my order")) == ("support", "")